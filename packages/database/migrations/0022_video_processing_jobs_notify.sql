@@ -0,0 +1,21 @@
+-- Migration: LISTEN/NOTIFY dispatch for video_processing_jobs
+-- Created: 2026-10-17
+--
+-- Workers LISTEN on the channel passed as the trigger argument and wake as
+-- soon as a job becomes 'pending' (new jobs and jobs reset for retry),
+-- instead of polling the table every few seconds.
+
+CREATE OR REPLACE FUNCTION notify_video_processing_job()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM pg_notify(TG_ARGV[0], NEW.id::text);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS video_processing_jobs_notify ON video_processing_jobs;
+CREATE TRIGGER video_processing_jobs_notify
+  AFTER INSERT OR UPDATE OF status ON video_processing_jobs
+  FOR EACH ROW
+  WHEN (NEW.status = 'pending')
+  EXECUTE FUNCTION notify_video_processing_job('video_processing_jobs');
@@ -0,0 +1,16 @@
+-- Migration: video_audio_analysis beat-detection cache
+-- Created: 2026-10-17
+--
+-- Duration, tempo and beat timestamps per audio content hash (SHA-256 of the
+-- file), so the video worker only runs beat tracking once per distinct track.
+-- analysis_version changes whenever the detection algorithm does.
+
+CREATE TABLE IF NOT EXISTS video_audio_analysis (
+  content_hash      VARCHAR(64) NOT NULL,
+  analysis_version  VARCHAR(20) NOT NULL,
+  duration          DOUBLE PRECISION NOT NULL,
+  tempo             DOUBLE PRECISION,
+  beat_times        JSONB NOT NULL DEFAULT '[]',
+  created_at        TIMESTAMP DEFAULT NOW(),
+  PRIMARY KEY (content_hash, analysis_version)
+);
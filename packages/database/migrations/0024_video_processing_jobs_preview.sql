@@ -0,0 +1,8 @@
+-- Migration: preview output for video_processing_jobs
+-- Created: 2026-10-17
+--
+-- Optional animated GIF or sprite-sheet preview produced by the video worker
+-- from frames it already renders (VIDEO_PREVIEW=gif|sprite).
+
+ALTER TABLE video_processing_jobs
+  ADD COLUMN IF NOT EXISTS output_preview_url TEXT;
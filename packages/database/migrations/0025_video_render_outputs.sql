@@ -0,0 +1,20 @@
+-- Migration: video_render_outputs render-plan deduplication
+-- Created: 2026-10-17
+--
+-- Maps a render fingerprint (SHA-256 over the job's render inputs: tenant,
+-- image content hashes, audio object ETag, text, overlay type, quality mode,
+-- duration target and render version) to the output of the first job that
+-- rendered it. The video worker completes identical jobs from this table
+-- instead of rendering them again.
+
+CREATE TABLE IF NOT EXISTS video_render_outputs (
+  fingerprint           VARCHAR(64) PRIMARY KEY,
+  tenant_id             UUID NOT NULL REFERENCES tenants(id),
+  source_job_id         UUID REFERENCES video_processing_jobs(id) ON DELETE SET NULL,
+  output_video_url      TEXT NOT NULL,
+  output_thumbnail_url  TEXT,
+  output_preview_url    TEXT,
+  created_at            TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS video_render_outputs_tenant_idx ON video_render_outputs (tenant_id);
@@ -0,0 +1,10 @@
+-- Migration: per-stage timings for video_processing_jobs
+-- Created: 2026-10-17
+--
+-- The video worker records how long each stage of a job took, in
+-- milliseconds, e.g. {"download": 840.2, "beat_detection": 95.1,
+-- "composition": 410.7, "encode": 18250.3, "thumbnail": 11.4, "upload": 930.8},
+-- next to the existing processing_time_ms total.
+
+ALTER TABLE video_processing_jobs
+  ADD COLUMN IF NOT EXISTS stage_timings JSONB;
@@ -0,0 +1,10 @@
+-- Migration: progress for video_processing_jobs
+-- Created: 2026-10-17
+--
+-- Render progress (0-100) reported by the video worker while a job is
+-- 'processing'. The worker coalesces updates and writes them at most every
+-- VIDEO_STATUS_FLUSH_INTERVAL seconds; completion sets 100 and a retry
+-- resets it to 0.
+
+ALTER TABLE video_processing_jobs
+  ADD COLUMN IF NOT EXISTS progress SMALLINT NOT NULL DEFAULT 0;
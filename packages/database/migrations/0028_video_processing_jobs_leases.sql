@@ -0,0 +1,17 @@
+-- Migration: worker leases for video_processing_jobs
+-- Created: 2026-10-17
+--
+-- A worker that claims a job records itself in worker_id (hostname:pid) and
+-- takes a lease (VIDEO_LEASE_SECONDS, default 60) that it renews every
+-- VIDEO_HEARTBEAT_INTERVAL seconds while it holds the job. If the worker
+-- dies (OOM kill, node loss), the lease expires and the reaper in every
+-- other worker puts the job back to 'pending' (one more attempt) or marks
+-- it 'failed' once max_attempts is used up.
+
+ALTER TABLE video_processing_jobs
+  ADD COLUMN IF NOT EXISTS worker_id VARCHAR(100),
+  ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP,
+  ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS video_jobs_lease_idx
+  ON video_processing_jobs (lease_expires_at) WHERE status = 'processing';
@@ -0,0 +1,27 @@
+-- Migration: tenant-fair scheduling for video_processing_jobs
+-- Created: 2026-10-17
+--
+-- The video worker claims jobs with weighted fair queueing across tenants
+-- (VIDEO_SCHEDULER=fair). Each tenant accumulates virtual_time: every claim
+-- charges the job's duration_target (30s when unset) divided by the
+-- tenant's weight, and the backlogged tenant with the lowest virtual_time is
+-- served next. max_in_flight caps the tenant's concurrently processing jobs
+-- (NULL = the worker's VIDEO_TENANT_MAX_IN_FLIGHT). Tenants without a row
+-- get weight 1 and are enrolled on their first claim.
+
+CREATE TABLE IF NOT EXISTS video_tenant_scheduling (
+  tenant_id      UUID PRIMARY KEY REFERENCES tenants(id),
+  weight         DOUBLE PRECISION NOT NULL DEFAULT 1 CHECK (weight > 0),
+  max_in_flight  INTEGER,
+  virtual_time   DOUBLE PRECISION NOT NULL DEFAULT 0,
+  updated_at     TIMESTAMP DEFAULT NOW()
+);
+
+-- Claim path: skip-scan over tenants with pending work and per-tenant heads
+-- by priority and by age, plus the per-tenant in-flight count
+CREATE INDEX IF NOT EXISTS video_jobs_pending_tenant_priority_idx
+  ON video_processing_jobs (tenant_id, priority DESC, created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS video_jobs_pending_tenant_created_idx
+  ON video_processing_jobs (tenant_id, created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS video_jobs_processing_tenant_idx
+  ON video_processing_jobs (tenant_id) WHERE status = 'processing';
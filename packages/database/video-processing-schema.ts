@@ -2,7 +2,9 @@ import {
   pgTable,
   text,
   integer,
+  smallint,
   decimal,
+  doublePrecision,
   timestamp,
   uuid,
   jsonb,
@@ -12,7 +14,7 @@ import {
   index,
   uniqueIndex,
 } from "drizzle-orm/pg-core";
-import { relations } from "drizzle-orm";
+import { relations, sql } from "drizzle-orm";
 import { tenants } from "./schema";
 
 // Video Processing Jobs table
@@ -41,14 +43,22 @@ export const videoProcessingJobs = pgTable(
     // Processing metadata
     startedAt: timestamp("started_at"),
     completedAt: timestamp("completed_at"),
+    progress: smallint("progress").notNull().default(0), // 0-100, coalesced by the video worker
     processingTimeMs: integer("processing_time_ms"),
+    stageTimings: jsonb("stage_timings"), // { [stage]: ms } written by the video worker
     attempts: integer("attempts").default(0),
     maxAttempts: integer("max_attempts").default(3),
     lastError: text("last_error"),
 
+    // Worker lease: renewed by heartbeats, expired leases are reaped back to 'pending'
+    workerId: varchar("worker_id", { length: 100 }),
+    heartbeatAt: timestamp("heartbeat_at"),
+    leaseExpiresAt: timestamp("lease_expires_at"),
+
     // Output
     outputVideoUrl: text("output_video_url"),
     outputThumbnailUrl: text("output_thumbnail_url"),
+    outputPreviewUrl: text("output_preview_url"), // GIF or sprite sheet (VIDEO_PREVIEW)
 
     createdAt: timestamp("created_at").defaultNow(),
     updatedAt: timestamp("updated_at").defaultNow(),
@@ -58,6 +68,18 @@ export const videoProcessingJobs = pgTable(
     statusIdx: index("video_jobs_status_idx").on(table.status),
     priorityIdx: index("video_jobs_priority_idx").on(table.priority),
     createdIdx: index("video_jobs_created_idx").on(table.createdAt),
+    leaseIdx: index("video_jobs_lease_idx")
+      .on(table.leaseExpiresAt)
+      .where(sql`${table.status} = 'processing'`),
+    pendingTenantPriorityIdx: index("video_jobs_pending_tenant_priority_idx")
+      .on(table.tenantId, table.priority.desc(), table.createdAt)
+      .where(sql`${table.status} = 'pending'`),
+    pendingTenantCreatedIdx: index("video_jobs_pending_tenant_created_idx")
+      .on(table.tenantId, table.createdAt)
+      .where(sql`${table.status} = 'pending'`),
+    processingTenantIdx: index("video_jobs_processing_tenant_idx")
+      .on(table.tenantId)
+      .where(sql`${table.status} = 'processing'`),
   }),
 );
 
@@ -82,6 +104,54 @@ export const videoProcessingAssets = pgTable(
   }),
 );
 
+// Beat-detection cache keyed by audio content hash (SHA-256)
+export const videoAudioAnalysis = pgTable(
+  "video_audio_analysis",
+  {
+    contentHash: varchar("content_hash", { length: 64 }).notNull(),
+    analysisVersion: varchar("analysis_version", { length: 20 }).notNull(),
+    duration: doublePrecision("duration").notNull(),
+    tempo: doublePrecision("tempo"),
+    beatTimes: jsonb("beat_times").notNull().default("[]"),
+    createdAt: timestamp("created_at").defaultNow(),
+  },
+  (table) => ({
+    pk: primaryKey({ columns: [table.contentHash, table.analysisVersion] }),
+  }),
+);
+
+// Per-tenant weighted fair queueing state for the video worker's job picker
+export const videoTenantScheduling = pgTable("video_tenant_scheduling", {
+  tenantId: uuid("tenant_id")
+    .primaryKey()
+    .references(() => tenants.id),
+  weight: doublePrecision("weight").notNull().default(1),
+  maxInFlight: integer("max_in_flight"), // null = VIDEO_TENANT_MAX_IN_FLIGHT
+  virtualTime: doublePrecision("virtual_time").notNull().default(0),
+  updatedAt: timestamp("updated_at").defaultNow(),
+});
+
+// Render-plan deduplication: fingerprint of a job's render inputs -> existing output
+export const videoRenderOutputs = pgTable(
+  "video_render_outputs",
+  {
+    fingerprint: varchar("fingerprint", { length: 64 }).primaryKey(),
+    tenantId: uuid("tenant_id")
+      .references(() => tenants.id)
+      .notNull(),
+    sourceJobId: uuid("source_job_id").references(() => videoProcessingJobs.id, {
+      onDelete: "set null",
+    }),
+    outputVideoUrl: text("output_video_url").notNull(),
+    outputThumbnailUrl: text("output_thumbnail_url"),
+    outputPreviewUrl: text("output_preview_url"),
+    createdAt: timestamp("created_at").defaultNow(),
+  },
+  (table) => ({
+    tenantIdx: index("video_render_outputs_tenant_idx").on(table.tenantId),
+  }),
+);
+
 // Relations
 export const videoProcessingJobsRelations = relations(
   videoProcessingJobs,
@@ -10,7 +10,22 @@ import json
 import logging
 import tempfile
 import shutil
-from typing import List, Dict, Optional, Tuple
+import argparse
+import signal
+import select
+import subprocess
+import multiprocessing
+import queue
+import fcntl
+import hashlib
+import mimetypes
+import socket
+import threading
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from typing import Callable, List, Dict, Optional, Tuple
 from pathlib import Path
 import time
 
@@ -20,10 +35,16 @@ if hasattr(sys.stdout, 'reconfigure'):
 if hasattr(sys.stderr, 'reconfigure'):
     sys.stderr.reconfigure(encoding='utf-8')
 
+import numpy as np
+
 # MoviePy imports
 from moviepy.editor import *
-from moviepy.audio.io import AudioFileClip
-from moviepy.video.fx.all import resize, margin
+from moviepy.audio.io.AudioFileClip import AudioFileClip
+from moviepy.audio.AudioClip import AudioArrayClip
+from moviepy.config import get_setting
+from PIL import Image
+
+FFMPEG_BINARY = get_setting("FFMPEG_BINARY")
 
 # Audio processing with fallback
 try:
@@ -34,6 +55,14 @@ except ImportError:
     LIBROSA_AVAILABLE = False
     logging.warning("Librosa not available, using fallback audio processing")
 
+# Fast affine resampling for the Ken Burns renderer, with a Pillow fallback
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+    logging.warning("OpenCV not available, Ken Burns frames will be resampled with Pillow")
+
 # Database imports (PostgreSQL)
 try:
     import psycopg2
@@ -46,48 +75,1554 @@ except ImportError:
 # Storage imports (S3/Cloudflare R2)
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
     from botocore.exceptions import ClientError
     BOTO3_AVAILABLE = True
 except ImportError:
     BOTO3_AVAILABLE = False
     logging.error("boto3 not available, storage operations will fail")
 
+# Bump when beat detection changes so cached analyses are recomputed
+AUDIO_ANALYSIS_VERSION = 'librosa-v2'
+# librosa's default analysis rate; beat tracking always runs on a mono mix at this rate
+ANALYSIS_SAMPLE_RATE = 22050
+STREAMING_ANALYSIS_VERSION = 'stream-v1'
+
+# Streaming beat detection: low-rate mono decode, ~23 ms hop like librosa's default at 22.05 kHz
+STREAM_SAMPLE_RATE = 11025
+STREAM_N_FFT = 1024
+STREAM_HOP = 256
+STREAM_BLOCK_FRAMES = 256  # STFT frames per decoded block (~6 s of audio)
+
+def detect_beats_streaming(audio_path: str, max_duration: Optional[float] = None) -> Tuple[float, float, List[float]]:
+    """Beat tracking on a downsampled mono stream with bounded memory
+
+    ffmpeg decodes straight to 11.025 kHz mono float32 and stops at
+    ``max_duration``. Blocks of samples are turned into a log-mel spectral
+    flux onset envelope with vectorized NumPy (STFT frames via strides), so
+    only one block plus the envelope are ever held in memory. Returns
+    ``(duration, tempo, beat_times)``.
+    """
+    command = [FFMPEG_BINARY, '-v', 'error', '-nostdin', '-i', audio_path]
+    if max_duration:
+        command += ['-t', f"{max_duration:.3f}"]
+    command += ['-ac', '1', '-ar', str(STREAM_SAMPLE_RATE), '-f', 'f32le', 'pipe:1']
+    
+    window = np.hanning(STREAM_N_FFT + 1)[:-1].astype(np.float32)
+    mel_basis = librosa.filters.mel(sr=STREAM_SAMPLE_RATE, n_fft=STREAM_N_FFT, n_mels=64).astype(np.float32)
+    block_bytes = STREAM_BLOCK_FRAMES * STREAM_HOP * 4
+    
+    # Center the first frame like librosa (reflect-free zero padding is close enough for onsets)
+    carry = np.zeros(STREAM_N_FFT // 2, dtype=np.float32)
+    previous_frame = None
+    envelope_blocks = []
+    total_samples = 0
+    
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            raw = process.stdout.read(block_bytes)
+            if not raw:
+                break
+            block = np.frombuffer(raw[:len(raw) - len(raw) % 4], dtype=np.float32)
+            total_samples += block.size
+            signal_block = np.concatenate([carry, block])
+            
+            n_frames = 1 + (signal_block.size - STREAM_N_FFT) // STREAM_HOP if signal_block.size >= STREAM_N_FFT else 0
+            if n_frames <= 0:
+                carry = signal_block
+                continue
+            
+            frames = np.lib.stride_tricks.as_strided(
+                signal_block,
+                shape=(n_frames, STREAM_N_FFT),
+                strides=(signal_block.strides[0] * STREAM_HOP, signal_block.strides[0])
+            )
+            power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+            log_mel = librosa.power_to_db(power @ mel_basis.T, ref=1.0, top_db=None)
+            
+            if previous_frame is not None:
+                log_mel = np.vstack([previous_frame, log_mel])
+                flux = np.maximum(0.0, np.diff(log_mel, axis=0)).mean(axis=1)
+            else:
+                flux = np.concatenate([[0.0], np.maximum(0.0, np.diff(log_mel, axis=0)).mean(axis=1)])
+            envelope_blocks.append(flux.astype(np.float32))
+            previous_frame = log_mel[-1:]
+            
+            carry = signal_block[n_frames * STREAM_HOP:]
+        
+        process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg decode failed: {process.stderr.read().decode('utf-8', 'replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.stderr.close()
+    
+    duration = total_samples / STREAM_SAMPLE_RATE
+    if not envelope_blocks:
+        return duration, 0.0, []
+    
+    onset_envelope = np.concatenate(envelope_blocks)
+    tempo, beats = librosa.beat.beat_track(
+        onset_envelope=onset_envelope,
+        sr=STREAM_SAMPLE_RATE,
+        hop_length=STREAM_HOP,
+        trim=False
+    )
+    beat_times = librosa.frames_to_time(beats, sr=STREAM_SAMPLE_RATE, hop_length=STREAM_HOP).tolist()
+    return duration, float(np.atleast_1d(tempo)[0]), beat_times
+
+# Composition geometry at full (normal) quality
+OUTPUT_SIZE = (1080, 1920)
+CONTENT_SIZE = (900, 1600)
+BACKGROUND_COLOR = (0x05, 0x05, 0x05)
+GOLD_COLOR = (0xD4, 0xAF, 0x37)
+
+# Render profiles for video_processing_jobs.quality_mode
+RENDER_PROFILES = {
+    'normal': {'scale': 1.0, 'fps': 30, 'preset': 'medium', 'crf': 20, 'tune': None, 'effects': True},
+    'eco': {'scale': 0.75, 'fps': 24, 'preset': 'veryfast', 'crf': 24, 'tune': None, 'effects': True},
+    # Static frames (no Ken Burns, no animated atmosphere): nearly every frame repeats, so encoding is cheap
+    'freeze': {'scale': 0.5, 'fps': 12, 'preset': 'ultrafast', 'crf': 26, 'tune': 'stillimage', 'effects': False},
+}
+
+def get_render_profile(quality_mode: Optional[str]) -> Dict:
+    """Resolve a job's quality_mode to a render profile with concrete pixel sizes"""
+    profile = dict(RENDER_PROFILES.get(quality_mode or 'normal', RENDER_PROFILES['normal']))
+    profile['name'] = quality_mode if quality_mode in RENDER_PROFILES else 'normal'
+    profile['size'] = scale_size(OUTPUT_SIZE, profile['scale'])
+    profile['content_size'] = scale_size(CONTENT_SIZE, profile['scale'])
+    return profile
+
+def scale_size(size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    """Scale a (width, height) pair, rounding to even numbers as yuv420p requires"""
+    return (int(round(size[0] * scale / 2)) * 2, int(round(size[1] * scale / 2)) * 2)
+
+# Peak resident memory of the ffmpeg/x264 encoder per output pixel, by preset (lookahead and
+# reference frames dominate); measured on 1080x1920 medium, 810x1440 veryfast, 540x960 ultrafast
+ENCODER_BYTES_PER_PIXEL = {'medium': 230, 'veryfast': 145, 'ultrafast': 95}
+# Full beat analysis decodes the whole track, whose length is unknown until it is downloaded
+AUDIO_ESTIMATE_SECONDS = 300
+
+def estimate_job_memory_mb(config: Dict, quality_mode: Optional[str], duration_target: Optional[float] = None) -> float:
+    """Estimated peak working memory of one job, its ffmpeg processes included, in MB
+
+    Counts what a job adds on top of an idle worker: two decoded Ken Burns
+    layers (a cut hands over from one to the next), the compositor's frame
+    buffers and flattened overlay, the encoder, and with full beat analysis
+    the 22.05 kHz analysis signal (plus the native-rate samples the MoviePy
+    backend keeps for its mux). Segmented renders multiply the
+    per-segment part. The atmosphere loop is left out: it is a read-only file
+    mapping that every job and worker on the host shares.
+    """
+    profile = get_render_profile(quality_mode)
+    width, height = profile['size']
+    content_width, content_height = profile['content_size']
+    layers = 2 * content_width * content_height * 3 * (1 + 1.05 ** 2)
+    # Output buffer, background, uint16 premultiplied overlay + inverse alpha, pipe chunk
+    compositor = width * height * 3 * 6
+    encoder = width * height * ENCODER_BYTES_PER_PIXEL.get(profile['preset'], ENCODER_BYTES_PER_PIXEL['medium'])
+    
+    segments = int(config.get('segment_workers', 0))
+    min_duration = float(config.get('segment_min_duration', 20))
+    if segments >= 2 and (duration_target is None or duration_target >= min_duration):
+        per_segment = (layers + compositor + encoder) * segments
+    else:
+        per_segment = layers + compositor + encoder
+    
+    audio = 0.0
+    if config.get('beat_analysis_mode', 'full') == 'full':
+        # Mono float32 signal, plus the complex STFT librosa's onset envelope is built from
+        audio = AUDIO_ESTIMATE_SECONDS * ANALYSIS_SAMPLE_RATE * (4 + 1025 * 8 / 512)
+        if config.get('render_backend', 'ffmpeg') == 'moviepy':
+            audio += AUDIO_ESTIMATE_SECONDS * 44100 * 2 * 4  # Stereo float32 kept for the mux
+    return (per_segment + audio) / (1024 * 1024)
+
+# Part of every render fingerprint: bump whenever the same inputs would render differently
+# (compositor changes; new frame/atmosphere assets in storage change their ETags instead)
+RENDER_VERSION = 'render-v3'
+
+def render_fingerprint(
+    job: Dict,
+    image_hashes: List[str],
+    audio_etag: Optional[str],
+    settings: Dict,
+    overlay_etags: Optional[Dict[str, Optional[str]]] = None
+) -> str:
+    """Canonical SHA-256 of everything that determines a job's rendered output
+
+    ``image_hashes`` are the ``media_assets.content_hash`` values in slideshow
+    order and ``audio_etag`` identifies the soundtrack object's content.
+    ``settings`` holds worker options that change the output (beat analysis,
+    preview mode) and ``overlay_etags`` the ETags of the frame and atmosphere
+    assets the overlay type uses.
+    """
+    duration_target = job.get('duration_target')
+    plan = {
+        'version': RENDER_VERSION,
+        'tenant_id': str(job['tenant_id']),
+        'images': image_hashes,
+        'audio': [job.get('audio_file'), audio_etag],
+        'text_overlay': job.get('text_overlay') or '',
+        'overlay_type': job.get('overlay_type') or 'golden-frame',
+        'overlays': overlay_etags or {},
+        'quality_mode': get_render_profile(job.get('quality_mode'))['name'],
+        'duration_target': round(float(duration_target), 2) if duration_target else None,
+        'settings': settings
+    }
+    return hashlib.sha256(json.dumps(plan, sort_keys=True).encode()).hexdigest()
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def parse_id_array(value) -> List[str]:
+    """Normalize a Postgres uuid[] column to a list of id strings
+
+    psycopg2 has no uuid typecaster registered here, so ``uuid[]`` values can
+    arrive either as a Python list or as the literal ``'{a,b,c}'``.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip().strip('"') for item in value.strip('{}').split(',') if item.strip()]
+    return [str(item) for item in value]
+
+# Per-job scratch directories are named video-job-{worker pid}-{job id}-{random}
+SCRATCH_PREFIX = 'video-job-'
+
+class AssetCache:
+    """Content-addressed on-disk asset cache shared by every worker process on a host
+
+    Files are stored as ``<root>/<hash[:2]>/<hash><ext>`` and are immutable once
+    published. A hit refreshes the file's mtime, which is what LRU eviction
+    orders by. Downloads go to a private ``.part`` file and are published with
+    an atomic rename under a per-prefix ``flock``, so concurrent workers never
+    see a partial file and only one of them fetches a missing object.
+    
+    Each process keeps a running estimate of the cache size: its last scan
+    plus what it has added since. The tree is only walked when that estimate
+    passes the cap, or when the last scan is older than ``SCAN_INTERVAL``
+    (other workers' additions are invisible until then).
+    """
+    
+    SCAN_INTERVAL = 60.0
+    
+    def __init__(self, root: str, max_bytes: int, logger: logging.Logger):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self.lock_dir = os.path.join(root, '.locks')
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self.estimated_bytes = 0
+        self.scanned_at: Optional[float] = None
+    
+    def path_for(self, content_hash: str, ext: str = '') -> str:
+        """Location of a cached object"""
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}{ext}")
+    
+    @contextmanager
+    def _locked(self, name: str, blocking: bool = True):
+        """Hold an exclusive ``flock`` on ``<root>/.locks/<name>.lock``"""
+        with open(os.path.join(self.lock_dir, f"{name}.lock"), 'a') as lock_file:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def get_or_fetch(self, content_hash: str, ext: str, fetch: Callable[[str], None]) -> Tuple[str, bool]:
+        """Return ``(path, hit)`` for an object, calling ``fetch(tmp_path)`` on a miss"""
+        path = self.path_for(content_hash, ext)
+        if self._touch(path):
+            return path, True
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Striped locks (256 files) keep concurrent misses on one hash from downloading twice
+        with self._locked(content_hash[:2]):
+            if self._touch(path):
+                return path, True
+            
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+            try:
+                fetch(tmp_path)
+                self.estimated_bytes += os.path.getsize(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        
+        self.evict()
+        return path, False
+    
+    def _touch(self, path: str) -> bool:
+        """Mark an entry as recently used; False if it does not exist"""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def fetch_into(self, content_hash: str, ext: str, fetch: Callable[[str], None], dest_path: str) -> bool:
+        """Place the cached object at ``dest_path``, fetching it on a miss; returns True on a hit
+
+        The job gets its own hard link (or copy), so a later eviction cannot
+        pull the file out from under a render that is still using it.
+        """
+        for attempt in range(2):
+            cached_path, hit = self.get_or_fetch(content_hash, ext, fetch)
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            try:
+                os.link(cached_path, dest_path)
+            except FileNotFoundError:
+                # Evicted by another process between lookup and link; fetch again
+                if attempt:
+                    raise
+                continue
+            except OSError:
+                # Different filesystem (e.g. cache on disk, scratch on tmpfs)
+                shutil.copyfile(cached_path, dest_path)
+            return hit
+        return False
+    
+    def evict(self):
+        """Delete least recently used entries until the cache is under its size cap"""
+        stale = self.scanned_at is None or time.monotonic() - self.scanned_at >= self.SCAN_INTERVAL
+        if self.estimated_bytes <= self.max_bytes and not stale:
+            return
+        
+        with self._locked('evict', blocking=False) as acquired:
+            if not acquired:
+                return  # Another process is already evicting
+            
+            entries = []
+            total = 0
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                if dirpath == self.lock_dir:
+                    continue
+                for filename in filenames:
+                    if filename.endswith('.part'):
+                        continue
+                    file_path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, file_path))
+                    total += stat.st_size
+            
+            self.scanned_at = time.monotonic()
+            self.estimated_bytes = total
+            if total <= self.max_bytes:
+                return
+            
+            # Evict down to 90% of the cap, so the next few misses fit without another scan
+            target = int(self.max_bytes * 0.9)
+            entries.sort()
+            for _, size, file_path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(file_path)
+                    total -= size
+                    self.logger.debug(f"🧹 Evicted cached asset: {file_path}")
+                except FileNotFoundError:
+                    pass
+            self.estimated_bytes = total
+
+def alpha_over(base: np.ndarray, layer: np.ndarray, position: Tuple[int, int]):
+    """Composite an RGBA ``layer`` onto an RGBA ``base`` at ``(x, y)``, in place (straight alpha)"""
+    x, y = position
+    height = min(layer.shape[0], base.shape[0] - y)
+    width = min(layer.shape[1], base.shape[1] - x)
+    if height <= 0 or width <= 0:
+        return
+    dst = base[y:y + height, x:x + width].astype(np.float32) / 255.0
+    src = layer[:height, :width].astype(np.float32) / 255.0
+    src_a, dst_a = src[..., 3:4], dst[..., 3:4]
+    out_a = src_a + dst_a * (1 - src_a)
+    out_rgb = (src[..., :3] * src_a + dst[..., :3] * dst_a * (1 - src_a)) / np.maximum(out_a, 1e-6)
+    base[y:y + height, x:x + width] = (np.dstack([out_rgb, out_a]) * 255).round().astype(np.uint8)
+
+def blend_constant(out: np.ndarray, src: np.ndarray, opacity: float, scratch: np.ndarray):
+    """``out = src * opacity + out * (1 - opacity)`` in place, using 8.8 fixed point"""
+    weight = int(round(opacity * 256))
+    np.multiply(src, weight, out=scratch, dtype=np.uint16)
+    # out * (256 - w) + src * w never exceeds 255 * 256, so uint16 cannot overflow
+    scratch += out.astype(np.uint16) * (256 - weight)
+    scratch += 128
+    scratch >>= 8
+    out[...] = scratch
+
+class StaticOverlay:
+    """Frame and text layers flattened into one premultiplied RGBA overlay
+
+    Only the bounding box of non-transparent pixels is kept. ``blend_into``
+    composites it over a frame with a single fixed-point NumPy expression:
+    ``out = premultiplied + out * (1 - alpha)``.
+    """
+    
+    def __init__(self, rgba: np.ndarray):
+        alpha = rgba[..., 3]
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if rows.size == 0:
+            self.box = None
+            return
+        
+        y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        self.box = (slice(y0, y1), slice(x0, x1))
+        crop = rgba[self.box].astype(np.uint16)
+        crop_alpha = crop[..., 3:4]
+        self.premultiplied = ((crop[..., :3] * crop_alpha + 127) // 255).astype(np.uint8)
+        # 0..256 so that alpha 0 leaves the pixel exactly unchanged after >> 8
+        self.inverse_alpha = (256 - (crop_alpha * 256 + 127) // 255).astype(np.uint16)
+        self.nbytes = self.premultiplied.nbytes + self.inverse_alpha.nbytes
+    
+    def blend_into(self, out: np.ndarray, scratch: Optional[np.ndarray] = None):
+        """Composite the overlay over ``out`` (H, W, 3 uint8) in place"""
+        if self.box is None:
+            return
+        region = out[self.box]
+        if scratch is None:
+            scratch = np.empty(region.shape, dtype=np.uint16)
+        np.multiply(region, self.inverse_alpha, out=scratch, dtype=np.uint16)
+        scratch += 128
+        scratch >>= 8
+        scratch += self.premultiplied
+        np.minimum(scratch, 255, out=scratch)
+        region[...] = scratch
+
+ATMOSPHERE_OPACITY = 0.7
+ATMOSPHERE_VERSION = 'atmos-v1'  # Bump when the prepared frame layout changes
+
+class AtmosphereLoop:
+    """Looping atmosphere overlay prepared once as a memory-mapped ``.npy`` frame array
+
+    ``prepare`` decodes the source video with ffmpeg at the output size and
+    fps, and stores every frame already blended over the background colour at
+    the overlay opacity. Because the atmosphere is the first layer above a
+    constant background, the composite of Z=0 and Z=1 at time ``t`` is just
+    frame ``t * fps mod loop_length`` of that array: no decode, resize or blend
+    per job. The file lives in the shared asset cache, so every worker on a
+    host maps the same pages.
+    """
+    
+    def __init__(self, path: str, fps: int):
+        self.path = path
+        self.fps = fps
+        self.frames = np.load(path, mmap_mode='r')
+        self.frame_count = self.frames.shape[0]
+    
+    def frame_at(self, t: float) -> np.ndarray:
+        """Read-only view of the prepared frame at time ``t``"""
+        return self.frames[int(t * self.fps + 1e-6) % self.frame_count]
+    
+    @staticmethod
+    def cache_key(source_hash: str, size: Tuple[int, int], fps: int, opacity: float) -> str:
+        """Content address of a prepared loop"""
+        spec = f"{ATMOSPHERE_VERSION}:{source_hash}:{size[0]}x{size[1]}:{fps}:{opacity:.3f}:{BACKGROUND_COLOR}"
+        return hashlib.sha256(spec.encode()).hexdigest()
+    
+    @staticmethod
+    def prepare(source_path: str, out_path: str, size: Tuple[int, int], fps: int, opacity: float):
+        """Decode ``source_path`` at ``size``/``fps`` and write the pre-blended frames to ``out_path``"""
+        width, height = size
+        # Ends in .part: inside the asset cache, eviction neither counts nor deletes it mid-prepare
+        raw_path = f"{out_path}.rgb.part"
+        command = [
+            FFMPEG_BINARY, '-v', 'error', '-nostdin', '-y', '-i', source_path,
+            '-an', '-vf', f"fps={fps},scale={width}:{height}",
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', raw_path
+        ]
+        try:
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            frame_bytes = width * height * 3
+            frame_count = os.path.getsize(raw_path) // frame_bytes
+            if frame_count == 0:
+                raise ValueError(f"No frames decoded from {source_path}")
+            
+            # Only the .npy header goes through open_memmap; frames are streamed through
+            # fixed buffers, so preparing a long loop never maps it into this process
+            prepared = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.uint8, shape=(frame_count, height, width, 3))
+            data_offset = prepared.offset
+            del prepared
+            decoded = np.empty((height, width, 3), dtype=np.uint8)
+            frame = np.empty_like(decoded)
+            scratch = np.empty((height, width, 3), dtype=np.uint16)
+            with open(raw_path, 'rb') as raw, open(out_path, 'r+b') as out:
+                out.seek(data_offset)
+                for _ in range(frame_count):
+                    raw.readinto(memoryview(decoded).cast('B'))
+                    frame[...] = BACKGROUND_COLOR
+                    blend_constant(frame, decoded, opacity, scratch)
+                    out.write(memoryview(frame).cast('B'))
+        finally:
+            if os.path.exists(raw_path):
+                os.remove(raw_path)
+
+class KenBurnsLayer:
+    """One product image on the timeline, zoomed 1.0 -> 1.05 over its own clip
+
+    The image is fitted inside the content box once, and an oversampled
+    source at the maximum zoom is kept. Each frame is then a centered crop
+    of that source scaled into a preallocated buffer. Crop sizes keep the
+    same parity as the source, so the crop stays exactly centered and the
+    zoom never drifts sideways. Consecutive frames that map to the same crop
+    reuse the previous result, and the last frame of the zoom is a plain copy.
+    
+    Only the image header is read up front. The pixels are decoded on the
+    clip's first frame (JPEGs at the smallest DCT scale that still covers
+    the source size) and dropped by ``release`` once the compositor moves
+    past the clip, so a job holds one or two decoded images at a time
+    however many it has.
+    """
+    
+    def __init__(
+        self,
+        image_path: str,
+        start: float,
+        duration: float,
+        box_size: Tuple[int, int],
+        animate: bool = True,
+        zoom_end: float = 1.05
+    ):
+        self.image_path = image_path
+        self.start = start
+        self.duration = duration
+        self.end = start + duration
+        self.animate = animate
+        self.zoom_end = zoom_end if animate else 1.0
+        
+        with Image.open(image_path) as image:
+            # Fit inside the content box, keeping the aspect ratio
+            fit = min(box_size[0] / image.width, box_size[1] / image.height)
+            self.size = (max(2, int(round(image.width * fit))), max(2, int(round(image.height * fit))))
+        self.source_size = (int(round(self.size[0] * self.zoom_end)), int(round(self.size[1] * self.zoom_end)))
+        
+        self.source: Optional[np.ndarray] = None
+        self.frame: Optional[np.ndarray] = None
+        self._rendered_crop = None
+    
+    @property
+    def materialized(self) -> bool:
+        return self.source is not None
+    
+    def materialize(self):
+        """Decode and resample the image into the oversampled source"""
+        with Image.open(self.image_path) as image:
+            image.draft('RGB', self.source_size)  # No-op for formats without reduced decoding
+            image = image.convert('RGB')
+            self.source = np.ascontiguousarray(np.asarray(image.resize(self.source_size, Image.LANCZOS)))
+        self.frame = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+        self._rendered_crop = None
+    
+    def release(self):
+        """Drop the decoded pixels; the next ``render`` decodes them again"""
+        self.source = None
+        self.frame = None
+        self._rendered_crop = None
+    
+    def zoom_at(self, local_t: float) -> float:
+        """Zoom factor at clip-local time ``local_t`` (linear 1.0 -> zoom_end)"""
+        if not self.animate or self.duration <= 0:
+            return 1.0
+        progress = min(1.0, max(0.0, local_t / self.duration))
+        return 1.0 + (self.zoom_end - 1.0) * progress
+    
+    def _crop_box(self, zoom: float) -> Tuple[int, int, int, int]:
+        """Centered source crop ``(x, y, width, height)`` that shows the image at ``zoom``"""
+        source_h, source_w = self.source.shape[:2]
+        step = self.zoom_end / zoom
+        # Margins are whole pixels on both sides, so the crop centre never moves
+        margin_x = int(round((source_w - self.size[0] * step) / 2))
+        margin_y = int(round((source_h - self.size[1] * step) / 2))
+        margin_x = min(max(margin_x, 0), (source_w - 2) // 2)
+        margin_y = min(max(margin_y, 0), (source_h - 2) // 2)
+        return margin_x, margin_y, source_w - 2 * margin_x, source_h - 2 * margin_y
+    
+    def render(self, local_t: float) -> np.ndarray:
+        """Return the frame at clip-local time ``local_t`` (the layer's reusable buffer)"""
+        if self.source is None:
+            self.materialize()
+        box = self._crop_box(self.zoom_at(local_t))
+        if box == self._rendered_crop:
+            return self.frame  # Same crop as the previous frame (and static freeze layers)
+        
+        x, y, width, height = box
+        crop = self.source[y:y + height, x:x + width]
+        if (width, height) == self.size:
+            self.frame[...] = crop
+        elif CV2_AVAILABLE:
+            cv2.resize(crop, self.size, dst=self.frame, interpolation=cv2.INTER_LINEAR)
+        else:
+            self.frame[...] = np.asarray(Image.fromarray(crop).resize(self.size, Image.BILINEAR))
+        
+        self._rendered_crop = box
+        return self.frame
+
+class FrameCompositor:
+    """Renders the 4-layer composition frame by frame into a reusable buffer
+
+    Z=0 background and Z=1 atmosphere come pre-blended from an
+    ``AtmosphereLoop`` (or a constant fill when there is none), Z=2 ``KenBurnsLayer`` frames are pasted centered, and
+    Z=3/Z=4 (frame and text) arrive pre-flattened as a single ``StaticOverlay``.
+    Content layers are decoded when they come on screen and released after.
+    """
+    
+    def __init__(
+        self,
+        size: Tuple[int, int],
+        duration: float,
+        fps: int,
+        atmosphere: Optional[AtmosphereLoop],
+        content_layers: List[KenBurnsLayer],
+        static_overlay: Optional[StaticOverlay]
+    ):
+        self.size = size
+        self.duration = duration
+        self.fps = fps
+        self.atmosphere = atmosphere
+        self.content_layers = content_layers
+        self.static_overlay = static_overlay
+        
+        width, height = size
+        self.background = np.empty((height, width, 3), dtype=np.uint8)
+        self.background[...] = BACKGROUND_COLOR
+        self.buffer = np.empty_like(self.background)
+        self.overlay_scratch = None
+        if static_overlay is not None and static_overlay.box is not None:
+            self.overlay_scratch = np.empty(static_overlay.premultiplied.shape, dtype=np.uint16)
+    
+    def render_into(self, t: float, out: np.ndarray) -> np.ndarray:
+        """Compose the frame at time ``t`` into ``out`` and return it"""
+        if self.atmosphere is not None:
+            out[...] = self.atmosphere.frame_at(t)
+        else:
+            out[...] = self.background
+        
+        for layer in self.content_layers:
+            if layer.start <= t < layer.end:
+                self._paste_centered(out, layer.render(t - layer.start))
+            elif layer.materialized:
+                layer.release()  # Off screen: keep only the layers being shown decoded
+        
+        if self.static_overlay is not None:
+            self.static_overlay.blend_into(out, self.overlay_scratch)
+        return out
+    
+    def _paste_centered(self, out: np.ndarray, frame: np.ndarray):
+        """Paste an RGB frame centered on ``out``, cropping whatever falls outside"""
+        frame_h, frame_w = frame.shape[:2]
+        out_h, out_w = out.shape[:2]
+        top, left = (out_h - frame_h) // 2, (out_w - frame_w) // 2
+        y0, x0 = max(0, top), max(0, left)
+        y1, x1 = min(out_h, top + frame_h), min(out_w, left + frame_w)
+        out[y0:y1, x0:x1] = frame[y0 - top:y1 - top, x0 - left:x1 - left]
+    
+    @property
+    def frame_count(self) -> int:
+        """Number of output frames (same rounding as MoviePy's frame iterator)"""
+        return int(np.ceil(self.duration * self.fps - 1e-6))
+    
+    def make_frame(self, t: float) -> np.ndarray:
+        """MoviePy frame function; returns the shared buffer (MoviePy copies it into ffmpeg)"""
+        return self.render_into(t, self.buffer)
+    
+    def to_clip(self, on_frame: Optional[Callable[[int, np.ndarray], None]] = None) -> VideoClip:
+        """Wrap the compositor as a MoviePy clip; ``on_frame(index, frame)`` sees every rendered frame"""
+        if on_frame is None:
+            return VideoClip(self.make_frame, duration=self.duration).set_fps(self.fps)
+        
+        def make_frame(t: float) -> np.ndarray:
+            frame = self.render_into(t, self.buffer)
+            on_frame(int(round(t * self.fps)), frame)
+            return frame
+        return VideoClip(make_frame, duration=self.duration).set_fps(self.fps)
+
+class FrameCapture:
+    """Keeps the thumbnail (and optional preview) from frames the encoder already rendered
+
+    The render loop calls ``observe`` with every composed frame. The frame at
+    ``thumbnail_time`` is copied once; when a preview is requested, up to
+    ``preview_frames`` evenly spaced frames are downscaled as they go by and
+    saved afterwards as an animated GIF or a JPEG sprite sheet.
+    """
+    
+    def __init__(
+        self,
+        frame_count: int,
+        fps: int,
+        thumbnail_time: float = 1.0,
+        preview_mode: str = 'none',
+        preview_width: int = 270,
+        preview_frames: int = 24
+    ):
+        self.fps = fps
+        self.thumbnail_index = min(max(frame_count - 1, 0), int(round(thumbnail_time * fps)))
+        self.thumbnail = None
+        self.preview_mode = preview_mode if preview_mode in ('gif', 'sprite') else 'none'
+        self.preview_width = preview_width
+        self.preview_stride = max(1, frame_count // max(1, preview_frames))
+        self.preview_limit = preview_frames
+        self.preview = []
+    
+    def observe(self, index: int, frame: np.ndarray):
+        """Called by the render loop for every output frame (``frame`` is reused afterwards)"""
+        if index == self.thumbnail_index:
+            self.thumbnail = frame.copy()
+        if self.preview_mode != 'none' and index % self.preview_stride == 0 and len(self.preview) < self.preview_limit:
+            height = int(round(frame.shape[0] * self.preview_width / frame.shape[1]))
+            if CV2_AVAILABLE:
+                self.preview.append(cv2.resize(frame, (self.preview_width, height), interpolation=cv2.INTER_AREA))
+            else:
+                self.preview.append(np.asarray(Image.fromarray(frame).resize((self.preview_width, height), Image.BILINEAR)))
+    
+    def merge(self, other: 'FrameCapture'):
+        """Fold in a capture that observed a later segment of the same video"""
+        if other.thumbnail is not None:
+            self.thumbnail = other.thumbnail
+        self.preview.extend(other.preview[:max(0, self.preview_limit - len(self.preview))])
+    
+    def save_thumbnail(self, path: str) -> bool:
+        if self.thumbnail is None:
+            return False
+        Image.fromarray(self.thumbnail).save(path, quality=90)
+        return True
+    
+    def save_preview(self, path_without_ext: str) -> Optional[str]:
+        """Write the preview and return its path, or None when no preview was requested"""
+        if self.preview_mode == 'none' or not self.preview:
+            return None
+        images = [Image.fromarray(frame) for frame in self.preview]
+        if self.preview_mode == 'gif':
+            path = f"{path_without_ext}.gif"
+            frame_ms = int(1000 * self.preview_stride / self.fps)
+            images[0].save(path, save_all=True, append_images=images[1:], duration=max(frame_ms, 100), loop=0)
+            return path
+        
+        columns = int(np.ceil(np.sqrt(len(images))))
+        rows = int(np.ceil(len(images) / columns))
+        tile_w, tile_h = images[0].size
+        sheet = Image.new('RGB', (columns * tile_w, rows * tile_h), BACKGROUND_COLOR)
+        for position, image in enumerate(images):
+            sheet.paste(image, ((position % columns) * tile_w, (position // columns) * tile_h))
+        path = f"{path_without_ext}.jpg"
+        sheet.save(path, quality=85)
+        return path
+
+def raw_video_input_args(size: Tuple[int, int], fps: int) -> List[str]:
+    """ffmpeg input options for rgb24 frames on stdin"""
+    return ['-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{size[0]}x{size[1]}", '-r', str(fps), '-i', 'pipe:0']
+
+def stream_frames_to_ffmpeg(
+    command: List[str],
+    compositor: FrameCompositor,
+    start_frame: int,
+    end_frame: int,
+    capture: Optional[FrameCapture] = None,
+    output_sink: Optional[Callable[[bytes], None]] = None,
+    progress: Optional[Callable[[int], None]] = None
+):
+    """Compose frames ``[start_frame, end_frame)`` and write them to ``command``'s stdin
+
+    Frames are composed into the compositor's reusable buffer and written
+    straight from it, so there is no per-frame copy and no intermediate file.
+    A blocking pipe write is the back-pressure: composition never runs more
+    than the pipe buffer ahead of the encoder. With ``output_sink`` the
+    command is expected to write its output to stdout, which is read on a
+    thread and handed to the sink chunk by chunk. ``progress`` is called
+    with the number of frames written once per second of video.
+    """
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE if output_sink else subprocess.DEVNULL,
+        stderr=subprocess.PIPE
+    )
+    # Drain stderr concurrently so a chatty ffmpeg can never block on a full pipe
+    stderr_tail = deque(maxlen=20)
+    drain = threading.Thread(
+        target=lambda: stderr_tail.extend(process.stderr.read().decode(errors='replace').splitlines()),
+        daemon=True
+    )
+    drain.start()
+    
+    sink_errors = []
+    reader = None
+    if output_sink:
+        def forward_output():
+            try:
+                for chunk in iter(lambda: process.stdout.read(1024 * 1024), b''):
+                    output_sink(chunk)
+            except Exception as e:
+                sink_errors.append(e)
+                process.kill()
+        reader = threading.Thread(target=forward_output, daemon=True)
+        reader.start()
+    
+    try:
+        for index in range(start_frame, end_frame):
+            frame = compositor.render_into(index / compositor.fps, compositor.buffer)
+            if capture is not None:
+                capture.observe(index, frame)
+            process.stdin.write(memoryview(frame).cast('B'))
+            if progress is not None and (index + 1 - start_frame) % compositor.fps == 0:
+                progress(index + 1 - start_frame)
+        process.stdin.close()
+    except BrokenPipeError:
+        pass  # ffmpeg exited early; its return code and stderr say why
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        return_code = process.wait()
+        drain.join()
+        if reader is not None:
+            reader.join()
+    
+    if sink_errors:
+        raise sink_errors[0]
+    if return_code != 0:
+        raise RuntimeError(f"ffmpeg exited with {return_code}: {' | '.join(stderr_tail)}")
+
+def plan_segments(cut_times: List[float], duration: float, fps: int, segments: int) -> List[Tuple[int, int]]:
+    """Split ``[0, duration)`` into up to ``segments`` frame ranges of similar length
+
+    Cuts are only placed at ``cut_times`` (clip boundaries), so every segment
+    starts on a scene change and its leading keyframe costs nothing extra.
+    """
+    frame_count = int(np.ceil(duration * fps - 1e-6))
+    candidates = sorted({int(round(t * fps)) for t in cut_times if 0 < int(round(t * fps)) < frame_count})
+    cuts = []
+    for part in range(1, segments):
+        if not candidates:
+            break
+        ideal = part * frame_count / segments
+        best = min(candidates, key=lambda frame: abs(frame - ideal))
+        if not cuts or best > cuts[-1]:
+            cuts.append(best)
+    bounds = [0] + cuts + [frame_count]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+# Set by VideoProcessor.write_segmented right before forking its pool: segment
+# workers inherit the fully built compositor instead of receiving a pickled copy
+_SEGMENT_COMPOSITOR: Optional[FrameCompositor] = None
+# Shared frame counter the segments add to, so the parent can report progress while they render
+_SEGMENT_FRAMES = None
+
+def _init_segment_worker():
+    """Process-pool initializer: make the forked child safe to compose frames in
+
+    The parent forks with other threads running (status writer, prefetcher,
+    metrics server, S3 transfers). The child therefore only ever touches the
+    compositor, numpy and a fresh ffmpeg subprocess: no logging, database
+    connection or storage client, whose locks another thread may have held
+    at fork time. It leaves through ``os._exit``, so inherited clients are
+    never finalized either (closing the psycopg2 connection would end the
+    parent's session).
+    """
+    if CV2_AVAILABLE:
+        # OpenCV's thread pool does not survive fork; segments already run in parallel
+        cv2.setNumThreads(0)
+
+def _render_segment(command: List[str], start_frame: int, end_frame: int, capture: Optional[FrameCapture]) -> Optional[FrameCapture]:
+    """Process-pool entry point: encode one segment of the inherited compositor"""
+    counted = 0
+    
+    def count_frames(frames_done: int):
+        nonlocal counted
+        with _SEGMENT_FRAMES.get_lock():
+            _SEGMENT_FRAMES.value += frames_done - counted
+        counted = frames_done
+    
+    stream_frames_to_ffmpeg(command, _SEGMENT_COMPOSITOR, start_frame, end_frame, capture, progress=count_frames)
+    # Progress is reported on whole seconds; the trailing partial second counts once encoded
+    count_frames(end_frame - start_frame)
+    return capture
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms in the Prometheus text format
+
+    Everything is updated in memory by the code that does the work; rendering
+    a scrape only reads these values under a lock and never touches the
+    database or storage.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: 'OrderedDict[str, Dict]' = OrderedDict()
+    
+    def _declare(self, name: str, kind: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None):
+        self.metrics[name] = {'type': kind, 'help': help_text, 'buckets': buckets, 'values': {}}
+    
+    def counter(self, name: str, help_text: str):
+        self._declare(name, 'counter', help_text)
+    
+    def gauge(self, name: str, help_text: str):
+        self._declare(name, 'gauge', help_text)
+    
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self._declare(name, 'histogram', help_text, tuple(sorted(buckets)))
+    
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        """Increment a counter, or move a gauge by ``amount``"""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            values = self.metrics[name]['values']
+            values[key] = values.get(key, 0.0) + amount
+    
+    def set(self, name: str, value: float, **labels):
+        with self.lock:
+            self.metrics[name]['values'][tuple(sorted(labels.items()))] = float(value)
+    
+    def replace(self, name: str, series: Dict[tuple, float]):
+        """Swap every series of a gauge at once (e.g. queue depth, where priorities come and go)"""
+        with self.lock:
+            self.metrics[name]['values'] = {tuple(sorted(labels)): float(value) for labels, value in series.items()}
+    
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            metric = self.metrics[name]
+            state = metric['values'].setdefault(key, {'counts': [0] * len(metric['buckets']), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(metric['buckets']):
+                if value <= bound:
+                    state['counts'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+    
+    def render(self) -> str:
+        """Prometheus text exposition (version 0.0.4)"""
+        def label_text(labels, extra: Tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+            return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+        
+        lines = []
+        with self.lock:
+            for name, metric in self.metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for labels, value in metric['values'].items():
+                    if metric['type'] != 'histogram':
+                        lines.append(f"{name}{label_text(labels)} {value:g}")
+                        continue
+                    for bound, count in zip(metric['buckets'], value['counts']):
+                        lines.append(f"{name}_bucket{label_text(labels, (('le', f'{bound:g}'),))} {count}")
+                    lines.append(f"{name}_bucket{label_text(labels, (('le', '+Inf'),))} {value['count']}")
+                    lines.append(f"{name}_sum{label_text(labels)} {value['sum']:g}")
+                    lines.append(f"{name}_count{label_text(labels)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+# One registry per worker process, shared by its VideoProcessor instances (worker and prefetcher)
+METRICS = MetricsRegistry()
+METRICS.gauge('video_queue_depth', 'Pending jobs by priority, as last sampled by this worker')
+METRICS.gauge('video_jobs_in_flight', 'Jobs this worker process is rendering right now')
+METRICS.counter('video_jobs_total', 'Jobs finished by this worker, by outcome (completed, reused, failed)')
+METRICS.counter('video_job_retries_total', 'Failed jobs put back to pending for another attempt')
+METRICS.counter('video_jobs_reaped_total', 'Jobs whose worker lost its lease, by outcome (requeued, failed)')
+METRICS.gauge('video_memory_reserved_mb', 'Estimated memory reserved by the jobs this worker holds (VIDEO_RSS_BUDGET_MB)')
+METRICS.counter('video_jobs_deferred_total', 'Claimed jobs released again because they no longer fit the memory budget')
+METRICS.histogram(
+    'video_stage_duration_seconds',
+    'Duration of each job stage',
+    (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+METRICS.gauge('video_encode_fps', 'Frames per second of the current or most recent encode, by quality mode')
+METRICS.counter('video_frames_encoded_total', 'Frames composed and encoded')
+METRICS.counter('video_s3_bytes_total', 'Bytes transferred to or from object storage, by direction')
+METRICS.counter('video_cache_requests_total', 'Cache lookups by cache and result (hit, miss)')
+for _name in ('video_jobs_in_flight', 'video_job_retries_total', 'video_frames_encoded_total', 'video_memory_reserved_mb'):
+    METRICS.set(_name, 0)  # Export unlabelled series from the first scrape
+
+def record_cache(cache: str, hit: bool):
+    METRICS.inc('video_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+def start_metrics_server(port: int, registry: MetricsRegistry = METRICS) -> ThreadingHTTPServer:
+    """Serve ``registry`` at ``http://0.0.0.0:<port>/metrics`` from a daemon thread"""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would drown the job logs
+    
+    server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+class StageTimer:
+    """Wall-clock duration of each stage of one job
+
+    ``with timer.stage('encode'):`` adds the block's duration (ms) to
+    ``timings['encode']`` and logs one JSON line per stage, so the log can be
+    aggregated without parsing free text.
+    """
+    
+    def __init__(self, job_id: str, logger: logging.Logger):
+        self.job_id = str(job_id)
+        self.logger = logger
+        self.timings: Dict[str, float] = {}
+        self.started = time.monotonic()
+    
+    @contextmanager
+    def stage(self, name: str):
+        started = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed_ms, 1)
+            METRICS.observe('video_stage_duration_seconds', elapsed_ms / 1000, stage=name)
+            self.logger.info("⏱️ " + json.dumps({
+                'event': 'job_stage', 'job_id': self.job_id, 'stage': name, 'ms': round(elapsed_ms, 1), 'ok': ok
+            }))
+    
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+S3_MIN_PART_SIZE = 5 * 1024 * 1024  # Every multipart part but the last must be at least 5 MiB
+
+class StreamingMultipartUpload:
+    """S3 multipart upload fed incrementally while the file is still being produced
+
+    ``write`` buffers bytes and submits each full part to a thread pool as
+    soon as it is available. At most ``concurrency`` parts are in flight or
+    queued; further writes block, which throttles the producer (ffmpeg) if
+    the network falls behind. ``complete`` sends the final short part and
+    commits the upload; ``abort`` discards it.
+    """
+    
+    def __init__(self, s3_client, bucket: str, key: str, part_size: int, concurrency: int, content_type: Optional[str] = None):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, S3_MIN_PART_SIZE)
+        self.buffer = bytearray()
+        self.bytes_written = 0
+        self.futures = []
+        self.slots = threading.Semaphore(max(1, concurrency))
+        self.pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='s3-part')
+        extra = {'ContentType': content_type} if content_type else {}
+        self.upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key, **extra)['UploadId']
+    
+    def write(self, data: bytes):
+        self.buffer += data
+        self.bytes_written += len(data)
+        while len(self.buffer) >= self.part_size:
+            self._submit(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+    
+    def _submit(self, body: bytes):
+        self.slots.acquire()
+        part_number = len(self.futures) + 1
+        
+        def upload() -> Dict:
+            try:
+                response = self.s3_client.upload_part(
+                    Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=part_number, Body=body
+                )
+                return {'PartNumber': part_number, 'ETag': response['ETag']}
+            finally:
+                self.slots.release()
+        
+        self.futures.append(self.pool.submit(upload))
+    
+    def complete(self):
+        """Upload the remaining bytes as the last part and commit the object"""
+        try:
+            if self.buffer or not self.futures:
+                self._submit(bytes(self.buffer))
+                self.buffer.clear()
+            parts = [future.result() for future in self.futures]
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={'Parts': parts}
+            )
+        finally:
+            self.pool.shutdown(wait=True)
+    
+    def abort(self):
+        """Drop every uploaded part"""
+        self.pool.shutdown(wait=True)
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except Exception:
+            pass  # The bucket's lifecycle rule for incomplete uploads is the backstop
+
+# Weighted fair queueing across tenants, as one statement on the autocommit connection:
+#  1. pending_tenants: skip-scan of the partial (tenant_id, ...) WHERE status = 'pending'
+#     index, one probe per tenant with pending work instead of a scan of every pending row
+#  2. candidates: those tenants under their in-flight cap, by virtual start time. A tenant's
+#     virtual_time is lifted to at most fair_credit_seconds behind the most-served tenant,
+#     so an idle tenant banks a bounded head start rather than unlimited credit
+#  3. walk: visits the candidates one rank at a time and stops at the first tenant with an
+#     available (lockable) head job, so only the heads it visits are locked; within a tenant
+#     the top-priority job competes with the oldest one, whose priority grows by one every
+#     priority_aging_seconds of waiting. picked takes that row by rank explicitly
+#  4. the job is claimed and the tenant is charged duration_target / weight (a tenant's
+#     first claim creates its scheduling row with the default weight of 1)
+# quality_modes (NULL = any) restricts the heads to jobs that fit the worker's memory budget.
+# In-flight caps are soft: workers claiming at the same instant can overshoot by one each.
+FAIR_CLAIM_QUERY = """
+    WITH RECURSIVE pending_tenants AS (
+        (SELECT tenant_id FROM video_processing_jobs
+         WHERE status = 'pending'
+         ORDER BY tenant_id LIMIT 1)
+        UNION ALL
+        SELECT (SELECT j.tenant_id FROM video_processing_jobs j
+                WHERE j.status = 'pending' AND j.tenant_id > t.tenant_id
+                ORDER BY j.tenant_id LIMIT 1)
+        FROM pending_tenants t
+        WHERE t.tenant_id IS NOT NULL
+    ),
+    clock AS (
+        SELECT COALESCE(MAX(virtual_time), 0) - %(credit)s AS floor FROM video_tenant_scheduling
+    ),
+    candidates AS MATERIALIZED (
+        SELECT p.tenant_id, clock.floor, COALESCE(s.weight, 1) AS weight,
+               ROW_NUMBER() OVER (ORDER BY GREATEST(COALESCE(s.virtual_time, 0), clock.floor), p.tenant_id) AS rank
+        FROM pending_tenants p
+        CROSS JOIN clock
+        LEFT JOIN video_tenant_scheduling s ON s.tenant_id = p.tenant_id
+        WHERE p.tenant_id IS NOT NULL
+          AND COALESCE(NULLIF(COALESCE(s.max_in_flight, %(max_in_flight)s), 0), 2147483647) > (
+              SELECT COUNT(*) FROM video_processing_jobs r
+              WHERE r.tenant_id = p.tenant_id AND r.status = 'processing'
+          )
+    ),
+    walk AS (
+        SELECT 0::bigint AS rank, NULL::uuid AS tenant_id, NULL::float8 AS floor, NULL::float8 AS weight,
+               NULL::uuid AS id, NULL::float8 AS cost
+        UNION ALL
+        SELECT c.rank, c.tenant_id, c.floor, c.weight, head.id, COALESCE(head.duration_target, 30)::float8
+        FROM walk w
+        JOIN candidates c ON c.rank = w.rank + 1
+        LEFT JOIN LATERAL (
+            SELECT j.id, j.priority, j.created_at, j.duration_target FROM video_processing_jobs j
+            WHERE j.tenant_id = c.tenant_id AND j.status = 'pending'
+              AND (%(quality_modes)s::text[] IS NULL OR j.quality_mode = ANY(%(quality_modes)s))
+            ORDER BY j.priority DESC, j.created_at
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        ) top ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT j.id, j.priority, j.created_at, j.duration_target FROM video_processing_jobs j
+            WHERE j.tenant_id = c.tenant_id AND j.status = 'pending'
+              AND (%(quality_modes)s::text[] IS NULL OR j.quality_mode = ANY(%(quality_modes)s))
+            ORDER BY j.created_at
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        ) oldest ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT h.id, h.duration_target
+            FROM (SELECT top.id, top.priority, top.created_at, top.duration_target
+                  WHERE top.id IS NOT NULL
+                  UNION ALL
+                  SELECT oldest.id, oldest.priority, oldest.created_at, oldest.duration_target
+                  WHERE oldest.id IS NOT NULL) h
+            ORDER BY h.priority + EXTRACT(EPOCH FROM NOW() - h.created_at) / %(aging)s DESC
+            LIMIT 1
+        ) head ON TRUE
+        WHERE w.id IS NULL
+    ),
+    picked AS (
+        SELECT tenant_id, floor, weight, id, cost FROM walk
+        WHERE id IS NOT NULL
+        ORDER BY rank
+        LIMIT 1
+    ),
+    charged AS (
+        UPDATE video_tenant_scheduling s
+        SET virtual_time = GREATEST(s.virtual_time, picked.floor) + picked.cost / s.weight, updated_at = NOW()
+        FROM picked
+        WHERE s.tenant_id = picked.tenant_id
+        RETURNING s.tenant_id
+    ),
+    enrolled AS (
+        INSERT INTO video_tenant_scheduling (tenant_id, virtual_time)
+        SELECT picked.tenant_id, GREATEST(picked.floor, 0) + picked.cost / picked.weight FROM picked
+        WHERE NOT EXISTS (SELECT 1 FROM charged)
+        ON CONFLICT (tenant_id) DO NOTHING
+    )
+    UPDATE video_processing_jobs j
+    SET status = 'processing', started_at = NOW(), updated_at = NOW(), progress = 0,
+        worker_id = %(worker_id)s, heartbeat_at = NOW(),
+        lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s)
+    FROM picked
+    WHERE j.id = picked.id
+    RETURNING j.*
+"""
+
+class JobStatusWriter:
+    """Applies job status, progress and lease heartbeats on a background thread
+
+    ``update_job_status`` hands its UPDATE to the writer and returns, so a
+    slow database never stalls a render. Statements are written in the
+    order they were submitted, on the writer's own autocommit connection,
+    one at a time so that a status change guarded by the job's lease can
+    tell when it matched no row. Progress is coalesced: only the latest
+    value per job is kept and all of them go out in a single UPDATE at most
+    every ``interval`` seconds. Losing the connection is retried with
+    exponential backoff (up to ``MAX_RETRY_DELAY``); a statement the
+    database rejects is logged and dropped, so it cannot hold up the ones
+    queued behind it.
+    
+    Jobs this process holds (``hold``/``drop``) get their lease renewed in
+    that same UPDATE every ``heartbeat_interval`` seconds, but only while
+    they move: a progress report or a ``tick`` (downloads, uploads, the
+    render loop) within the last ``lease_seconds``, or a single long call
+    wrapped in ``busy`` (audio analysis) still running. A render that hangs
+    stops renewing its lease just like a worker that died, and
+    ``VideoProcessor.reap_expired_leases`` on any worker returns the job to
+    the queue. Jobs ``park``ed in the prefetch hand-off queue are renewed as
+    long as some job of this process is still moving (or none is running).
+    """
+    
+    MAX_RETRY_DELAY = 30.0
+    
+    def __init__(
+        self,
+        connect: Callable,
+        logger: logging.Logger,
+        worker_id: str,
+        interval: float = 2.0,
+        heartbeat_interval: float = 15.0,
+        lease_seconds: float = 60.0
+    ):
+        self.connect = connect
+        self.logger = logger
+        self.worker_id = worker_id
+        self.interval = interval
+        self.heartbeat_interval = heartbeat_interval
+        self.lease_seconds = lease_seconds
+        self.conn = None
+        self.statements: List[Tuple[str, list, Optional[str]]] = []
+        self.progress: Dict[str, int] = {}
+        self.leases: set = set()
+        self.parked: set = set()
+        self.stalled: set = set()
+        self.activity: Dict[str, float] = {}
+        self.busy_jobs: Dict[str, int] = {}
+        self.progress_written_at = 0.0
+        self.heartbeat_written_at = 0.0
+        self.retry_delay = interval
+        self.submitted = 0
+        self.written = 0
+        self.stopping = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name='status-writer', daemon=True)
+        self.thread.start()
+    
+    def submit(self, query: str, values: list, lease_guard: Optional[str] = None):
+        """Queue one statement; it is written as soon as the writer wakes
+
+        With ``lease_guard`` (a description of the change) the statement only
+        applies while this worker holds the job, and matching no row is
+        logged as a lost lease.
+        """
+        with self.cond:
+            self.statements.append((query, values, lease_guard))
+            self.submitted += 1
+            self.cond.notify_all()
+    
+    def set_progress(self, job_id: str, percent: int):
+        """Record a job's progress; superseded values are never written"""
+        with self.cond:
+            self.progress[str(job_id)] = max(0, min(100, int(percent)))
+            self.activity[str(job_id)] = time.monotonic()
+    
+    def tick(self, job_id: str):
+        """Note that a job moved forward without a new progress value"""
+        with self.cond:
+            self.activity[str(job_id)] = time.monotonic()
+    
+    @contextmanager
+    def busy(self, job_id: str):
+        """Treat a job as moving for the duration of one call that cannot tick"""
+        job_id = str(job_id)
+        with self.cond:
+            self.busy_jobs[job_id] = self.busy_jobs.get(job_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.busy_jobs[job_id] -= 1
+                if not self.busy_jobs[job_id]:
+                    del self.busy_jobs[job_id]
+                self.activity[job_id] = time.monotonic()
+    
+    def hold(self, job_id: str):
+        """Keep renewing the lease of a job this process claimed (or took off the hand-off queue)"""
+        job_id = str(job_id)
+        with self.cond:
+            self.leases.add(job_id)
+            self.parked.discard(job_id)
+            self.stalled.discard(job_id)
+            self.activity[job_id] = time.monotonic()
+    
+    def park(self, job_id: str):
+        """Mark a held job as prepared and waiting for the worker to start it"""
+        with self.cond:
+            self.parked.add(str(job_id))
+    
+    def drop(self, job_id: str):
+        """Stop renewing a job's lease (it finished or went back to the queue)"""
+        job_id = str(job_id)
+        with self.cond:
+            self.leases.discard(job_id)
+            self.parked.discard(job_id)
+            self.stalled.discard(job_id)
+            self.activity.pop(job_id, None)
+            self.progress.pop(job_id, None)
+    
+    def _live_leases(self, now: float) -> set:
+        """Held jobs whose lease should be renewed now (called with ``cond`` held)"""
+        running = self.leases - self.parked
+        live = {
+            job_id for job_id in running
+            if job_id in self.busy_jobs or now - self.activity.get(job_id, now) < self.lease_seconds
+        }
+        for job_id in running - live - self.stalled:
+            self.stalled.add(job_id)
+            self.logger.warning(f"⚠️ Job {job_id} made no progress for {self.lease_seconds:.0f}s, letting its lease expire")
+        if live or not running:
+            live |= self.parked
+        return live
+    
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait until every statement submitted so far has been written"""
+        with self.cond:
+            target = self.submitted
+            self.cond.notify_all()
+            return self.cond.wait_for(lambda: self.written >= target, timeout)
+    
+    def stop(self, timeout: float = 30.0):
+        """Write what is queued, then close the connection"""
+        if not self.flush(timeout):
+            self.logger.error(f"❌ Dropping {len(self.statements)} unwritten job status update(s)")
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+    
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(
+                    lambda: self.statements or self.stopping,
+                    timeout=min(self.interval, self.heartbeat_interval)
+                )
+                if self.stopping:
+                    progress, self.progress = self.progress, {}
+                    break
+                statements, self.statements = self.statements, []
+                progress = {}
+                now = time.monotonic()
+                if self.progress and now - self.progress_written_at >= self.interval:
+                    progress, self.progress = self.progress, {}
+                heartbeat = bool(self.leases) and now - self.heartbeat_written_at >= self.heartbeat_interval
+                if heartbeat:
+                    progress = dict({job_id: None for job_id in self._live_leases(now)}, **progress)
+            if not statements and not progress:
+                continue
+            batch_size = len(statements)
+            had_progress = bool(progress)
+            try:
+                self._write(statements, progress)
+                self.retry_delay = self.interval
+                with self.cond:
+                    self.written += batch_size
+                    if had_progress:
+                        self.progress_written_at = time.monotonic()
+                    if heartbeat:
+                        self.heartbeat_written_at = time.monotonic()
+                    self.cond.notify_all()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                self.logger.warning(f"⚠️ Job status write failed, retrying in {self.retry_delay:.1f}s: {str(e)}")
+                with self.cond:
+                    # _write consumed what it applied; only the rest goes back to the front
+                    self.written += batch_size - len(statements)
+                    self.statements[:0] = statements
+                    self.progress = dict({k: v for k, v in progress.items() if v is not None}, **self.progress)
+                    self.cond.notify_all()
+                    self.cond.wait_for(lambda: self.stopping, timeout=self.retry_delay)
+                self.retry_delay = min(self.retry_delay * 2, self.MAX_RETRY_DELAY)
+        try:
+            if progress:
+                self._write([], progress)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Final job progress write failed: {str(e)}")
+        if self.conn is not None:
+            self.conn.close()
+    
+    def _write(self, statements: List[Tuple[str, list, Optional[str]]], progress: Dict[str, Optional[int]]):
+        """Apply a batch: the coalesced progress/heartbeat UPDATE, then each statement in order
+
+        ``progress`` maps job ids to a percentage, or None for a heartbeat
+        that leaves the stored progress as is; every listed job that this
+        worker still holds gets its lease renewed. Both arguments are
+        consumed as they are applied, so after a connection error (the only
+        exception raised) they hold what is still to be written.
+        """
+        try:
+            if self.conn is None or self.conn.closed:
+                self.conn = self.connect()
+                self.conn.autocommit = True
+            with self.conn.cursor() as cursor:
+                if progress:
+                    # Progress first: a status change in the same batch always wins
+                    rows = ', '.join(['(%s::uuid, %s::smallint)'] * len(progress))
+                    try:
+                        cursor.execute(
+                            "UPDATE video_processing_jobs AS j "
+                            "SET progress = COALESCE(v.progress, j.progress), heartbeat_at = NOW(), "
+                            "lease_expires_at = NOW() + make_interval(secs => %s), updated_at = NOW() "
+                            f"FROM (VALUES {rows}) AS v(id, progress) "
+                            "WHERE j.id = v.id AND j.status = 'processing' AND j.worker_id = %s",
+                            [self.lease_seconds] + [item for pair in progress.items() for item in pair] + [self.worker_id]
+                        )
+                    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                        raise
+                    except Exception as e:
+                        self.logger.error(f"❌ Dropped progress/heartbeat update of {len(progress)} job(s): {str(e)}")
+                    progress.clear()
+                while statements:
+                    query, values, lease_guard = statements[0]
+                    try:
+                        cursor.execute(query, values)
+                        if lease_guard and cursor.rowcount == 0:
+                            self.logger.warning(f"⚠️ Lease lost, dropped {lease_guard}")
+                    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                        raise
+                    except Exception as e:
+                        # Autocommit: the failed statement rolled back alone and the connection stays usable
+                        self.logger.error(f"❌ Dropped job status update the database rejected ({lease_guard or query[:60]}): {str(e)}")
+                    statements.pop(0)
+        except Exception:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+            raise
+
+_LOGGING_CONFIGURED = False
+_LOGGING_LOCK = threading.Lock()
+
+def configure_logging():
+    """Install the worker's root log handlers, once per process
+
+    Every VideoProcessor (the worker's and its prefetcher's) calls this; only
+    the first call replaces the root handlers, so a later instance never
+    swaps them out while other threads are logging.
+    """
+    global _LOGGING_CONFIGURED
+    with _LOGGING_LOCK:
+        if _LOGGING_CONFIGURED:
+            return
+        # force: the import-time availability messages already gave the root logger a
+        # default WARNING handler, which would otherwise turn this call into a no-op
+        logging.basicConfig(
+            force=True,
+            level=logging.INFO,
+            format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.StreamHandler(sys.stdout),
+                logging.FileHandler('/tmp/video-processor.log', encoding='utf-8')
+            ]
+        )
+        _LOGGING_CONFIGURED = True
+
 class VideoProcessor:
     """Main video processing class with luxury golden frame composition"""
     
-    def __init__(self, config: Dict):
+    def __init__(
+        self,
+        config: Dict,
+        status_writer: Optional['JobStatusWriter'] = None,
+        memory_budget: Optional['MemoryBudget'] = None
+    ):
         self.config = config
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
         self.db_conn = None
+        self.listen_conn = None
+        # A writer passed in (the prefetcher shares the worker's) is owned, and stopped, by its creator
+        self.status_writer: Optional[JobStatusWriter] = status_writer
+        self.owns_status_writer = status_writer is None
+        self.memory_budget = memory_budget
+        self.memory_blocked = False
         self.s3_client = None
+        self.transfer_config = None
+        self.asset_cache = None
+        self.static_layer_cache: 'OrderedDict[tuple, StaticOverlay]' = OrderedDict()
+        self.stage_timer: Optional[StageTimer] = None
+        self.atmosphere_loops: Dict[str, AtmosphereLoop] = {}
+        self.scratch_root = tempfile.gettempdir()
         self.setup_logging()
         self.setup_connections()
+        self.setup_asset_cache()
+        self.setup_scratch()
     
     def setup_logging(self):
         """Configure structured logging with UTF-8 support"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler(sys.stdout),
-                logging.FileHandler('/tmp/video-processor.log', encoding='utf-8')
-            ]
-        )
+        configure_logging()
         self.logger = logging.getLogger('VideoProcessor')
     
+    def connect_db(self):
+        """Open a new database connection using the worker configuration"""
+        return psycopg2.connect(
+            host=self.config.get('db_host', 'localhost'),
+            database=self.config.get('db_name', 'sass_store'),
+            user=self.config.get('db_user', 'postgres'),
+            password=self.config.get('db_password', ''),
+            port=self.config.get('db_port', '5432'),
+            cursor_factory=RealDictCursor
+        )
+    
     def setup_connections(self):
         """Initialize database and storage connections"""
         # Database connection
         if PSYCOPG2_AVAILABLE:
             try:
-                self.db_conn = psycopg2.connect(
-                    host=self.config.get('db_host', 'localhost'),
-                    database=self.config.get('db_name', 'sass_store'),
-                    user=self.config.get('db_user', 'postgres'),
-                    password=self.config.get('db_password', ''),
-                    port=self.config.get('db_port', '5432'),
-                    cursor_factory=RealDictCursor
-                )
+                self.db_conn = self.connect_db()
+                # Every statement commits on its own: no transaction (and no snapshot or
+                # row lock) is ever left open while a job renders
+                self.db_conn.autocommit = True
                 self.logger.info("✅ Database connection established")
+                if self.status_writer is None:
+                    self.status_writer = JobStatusWriter(
+                        self.connect_db,
+                        self.logger,
+                        self.worker_id,
+                        interval=float(self.config.get('status_flush_interval', 2.0)),
+                        heartbeat_interval=float(self.config.get('heartbeat_interval', 15)),
+                        lease_seconds=float(self.config.get('lease_seconds', 60))
+                    )
             except Exception as e:
                 self.logger.error(f"❌ Database connection failed: {str(e)}")
                 self.db_conn = None
@@ -97,48 +1632,236 @@ class VideoProcessor:
         # S3 client for asset storage
         if BOTO3_AVAILABLE:
             try:
+                # One pooled client per worker, kept for every job: it is thread-safe and reuses connections
+                pool_size = int(self.config.get('s3_max_pool_connections', 32))
                 self.s3_client = boto3.client(
                     's3',
                     endpoint_url=self.config.get('s3_endpoint', ''),
                     aws_access_key_id=self.config.get('s3_access_key', ''),
-                    aws_secret_access_key=self.config.get('s3_secret_key', '')
+                    aws_secret_access_key=self.config.get('s3_secret_key', ''),
+                    config=BotoConfig(
+                        max_pool_connections=pool_size,
+                        retries={'max_attempts': 5, 'mode': 'standard'},
+                        tcp_keepalive=True
+                    )
+                )
+                part_size = int(self.config.get('s3_part_size_mb', 16)) * 1024 * 1024
+                self.transfer_config = TransferConfig(
+                    multipart_threshold=part_size,
+                    multipart_chunksize=part_size,
+                    max_concurrency=int(self.config.get('s3_transfer_concurrency', 8)),
+                    use_threads=True
                 )
-                self.logger.info("✅ Storage client initialized")
+                self.logger.info(f"✅ Storage client initialized ({pool_size} pooled connections)")
             except Exception as e:
                 self.logger.error(f"❌ Storage client failed: {str(e)}")
                 self.s3_client = None
         else:
             self.logger.error("❌ boto3 not available")
     
-    def process_job(self, job_id: str) -> bool:
-        """Process a single video job with comprehensive error handling"""
+    def setup_asset_cache(self):
+        """Initialize the shared on-disk asset cache if configured"""
+        cache_dir = self.config.get('asset_cache_dir')
+        if not cache_dir:
+            return
+        
         try:
-            self.logger.info(f"🎬 Starting video processing job: {job_id} ✨")
+            max_bytes = int(self.config.get('asset_cache_max_mb', 2048)) * 1024 * 1024
+            self.asset_cache = AssetCache(cache_dir, max_bytes, self.logger)
+            self.logger.info(f"✅ Asset cache enabled: {cache_dir} ({max_bytes // (1024 * 1024)} MB)")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Asset cache disabled: {str(e)}")
+            self.asset_cache = None
+    
+    def close(self):
+        """Flush pending job status writes and close database connections"""
+        if self.status_writer is not None and self.owns_status_writer:
+            self.status_writer.stop()
+        self.status_writer = None
+        for conn in (self.db_conn, self.listen_conn):
+            if conn is not None:
+                conn.close()
+        self.db_conn = self.listen_conn = None
+    
+    def setup_scratch(self):
+        """Pick the root for per-job scratch directories and remove those left by dead workers
+
+        ``VIDEO_SCRATCH_DIR`` may point at a tmpfs such as /dev/shm. Every
+        job directory carries its worker's pid, so a worker that crashed
+        mid-job leaves nothing behind once any worker on the host restarts.
+        """
+        root = self.config.get('scratch_dir') or tempfile.gettempdir()
+        try:
+            os.makedirs(root, exist_ok=True)
+            if not os.access(root, os.W_OK | os.X_OK):
+                raise PermissionError(f"{root} is not writable")
+            self.scratch_root = root
+        except Exception as e:
+            self.logger.warning(f"⚠️ Scratch dir {root} unusable, using {tempfile.gettempdir()}: {str(e)}")
+            self.scratch_root = tempfile.gettempdir()
+        
+        try:
+            for entry in os.scandir(self.scratch_root):
+                if not entry.name.startswith(SCRATCH_PREFIX) or not entry.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    owner = int(entry.name[len(SCRATCH_PREFIX):].split('-', 1)[0])
+                    os.kill(owner, 0)
+                except (ValueError, PermissionError):
+                    continue  # Not ours to judge, or alive under another user
+                except ProcessLookupError:
+                    self.logger.info(f"🧹 Removing scratch dir of dead worker: {entry.path}")
+                    shutil.rmtree(entry.path, ignore_errors=True)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Orphaned scratch sweep failed: {str(e)}")
+        self.logger.info(f"✅ Job scratch dirs under {self.scratch_root}")
+    
+    def create_scratch_dir(self, job_id: str) -> str:
+        """Private directory for one job's downloads and outputs (remove with ``remove_scratch_dir``)"""
+        return tempfile.mkdtemp(prefix=f"{SCRATCH_PREFIX}{os.getpid()}-{job_id}-", dir=self.scratch_root)
+    
+    def remove_scratch_dir(self, scratch_dir: Optional[str]):
+        """Delete a job's scratch directory and everything in it"""
+        if not scratch_dir:
+            return
+        try:
+            shutil.rmtree(scratch_dir)
+            self.logger.debug(f"🧹 Removed scratch dir: {scratch_dir}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to remove scratch dir {scratch_dir}: {str(e)}")
+    
+    def setup_listener(self) -> bool:
+        """Open a dedicated autocommit connection that LISTENs for new jobs"""
+        if not PSYCOPG2_AVAILABLE:
+            return False
+        
+        channel = self.config.get('notify_channel', 'video_processing_jobs')
+        try:
+            if self.listen_conn is not None:
+                self.listen_conn.close()
+            self.listen_conn = self.connect_db()
+            self.listen_conn.autocommit = True
+            with self.listen_conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{channel}"')
+            self.logger.info(f"👂 Listening for job notifications on channel '{channel}'")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Failed to set up job listener: {str(e)}")
+            self.listen_conn = None
+            return False
+    
+    def wait_for_work(self, timeout: float) -> bool:
+        """Block until a job notification arrives or ``timeout`` seconds pass
+
+        Returns True when woken by a notification. Without a listener this is
+        a plain sleep, which keeps the classic polling behaviour.
+        """
+        if self.listen_conn is None:
+            time.sleep(timeout)
+            return False
+        
+        try:
+            # Notifications that arrived while we were busy are already queued
+            self.listen_conn.poll()
+            if not self.listen_conn.notifies:
+                readable, _, _ = select.select([self.listen_conn], [], [], timeout)
+                if readable:
+                    self.listen_conn.poll()
             
-            # Update job status to processing
-            self.update_job_status(job_id, 'processing', started_at='NOW()')
+            woken = bool(self.listen_conn.notifies)
+            self.listen_conn.notifies.clear()
+            return woken
+        except Exception as e:
+            self.logger.warning(f"⚠️ Job listener failed, reconnecting: {str(e)}")
+            self.setup_listener()
+            return False
+    
+    def process_job(self, job_id: str, job: Optional[Dict] = None, prepared: Optional[Dict] = None) -> bool:
+        """Process a single video job with comprehensive error handling
+
+        When ``job`` is given it is the row returned by ``claim_next_job``, which
+        already moved the job to 'processing' in the claiming transaction.
+        ``prepared`` is the result of ``prepare_job`` when a ``JobPrefetcher``
+        already downloaded the assets and analysed the audio.
+        
+        Stage durations (including those ``prepare_job`` measured) are stored
+        in ``stage_timings`` and their wall-clock total in ``processing_time_ms``.
+        """
+        timer = self.stage_timer = StageTimer(job_id, self.logger)
+        prepare_ms = 0
+        self.hold_lease(job_id)
+        try:
+            self.logger.info(f"🎬 Starting video processing job: {job_id} ✨")
             
-            # Get job details
-            job = self.get_job(job_id)
+            if job is None:
+                # Update job status to processing
+                self.update_job_status(job_id, 'processing', started_at='NOW()')
+                
+                # Get job details
+                job = self.get_job(job_id)
             if not job:
                 self.logger.error(f"❌ Job {job_id} not found")
                 return False
             
-            # Download required assets
-            assets = self.download_assets(job)
+            # Download required assets and process audio with beat detection
+            if prepared is None:
+                prepared = self.prepare_job(job)
+            else:
+                prepare_ms = prepared.get('prepare_ms', 0)  # Prefetched: not part of this call's wall time
+            timer.timings.update(prepared.get('stage_timings', {}))
+            if prepared.get('error'):
+                raise RuntimeError(prepared['error'])
+            
+            reused = prepared.get('reused')
+            if reused:
+                self.logger.info(f"♻️ Identical render found (job {reused['source_job_id']}), reusing its output")
+                self.update_job_status(
+                    job_id,
+                    'completed',
+                    output_video_url=reused['output_video_url'],
+                    output_thumbnail_url=reused['output_thumbnail_url'],
+                    output_preview_url=reused['output_preview_url'],
+                    completed_at='NOW()',
+                    **self.timing_fields(timer, prepare_ms)
+                )
+                METRICS.inc('video_jobs_total', status='reused')
+                return True
+            
+            assets = prepared['assets']
             if not assets:
                 self.logger.error(f"❌ Failed to download assets for job {job_id}")
-                self.update_job_status(job_id, 'failed', last_error='Asset download failed')
+                self.update_job_status(
+                    job_id, 'failed', last_error='Asset download failed', attempts=True, **self.timing_fields(timer, prepare_ms)
+                )
+                METRICS.inc('video_jobs_total', status='failed')
                 return False
+            # The video is the track cut to duration_target, whichever beat analysis mode ran
+            audio_duration = prepared['audio_duration']
+            if job.get('duration_target'):
+                audio_duration = min(audio_duration, float(job['duration_target']))
+            beat_times = [t for t in prepared['beat_times'] if t < audio_duration]
+            self.report_progress(job_id, 20)
             
-            # Process audio with beat detection
-            audio_duration, beat_times = self.process_audio(job.get('audio_file'))
+            # Create 4-layer composition with the job's quality_mode profile
+            profile = get_render_profile(job.get('quality_mode'))
+            with timer.stage('composition'):
+                compositor = self.create_composition(assets, audio_duration, beat_times, job, profile, prepared['scratch_dir'])
+            self.report_progress(job_id, 25)
             
-            # Create 4-layer composition
-            video_clip = self.create_composition(assets, audio_duration, beat_times, job)
-            
-            # Generate output video and thumbnail
-            output_url, thumbnail_url = self.generate_output(video_clip, job_id, job['tenant_id'])
+            # Generate output video, thumbnail and preview, muxing the job's own soundtrack
+            output_url, thumbnail_url, preview_url = self.generate_output(
+                compositor,
+                job_id,
+                job['tenant_id'],
+                prepared['scratch_dir'],
+                audio_path=assets.get('audio_path'),
+                decoded_audio=prepared.get('decoded_audio'),
+                profile=profile
+            )
+            if not output_url:
+                raise RuntimeError("Render produced no output video URL")
             
             # Update job with results
             self.update_job_status(
@@ -146,10 +1869,15 @@ class VideoProcessor:
                 'completed',
                 output_video_url=output_url,
                 output_thumbnail_url=thumbnail_url,
-                completed_at='NOW()'
+                output_preview_url=preview_url,
+                completed_at='NOW()',
+                **self.timing_fields(timer, prepare_ms)
             )
+            if prepared.get('fingerprint'):
+                self.store_render_output(prepared['fingerprint'], job)
             
             self.logger.info(f"✅ Successfully completed job {job_id}")
+            METRICS.inc('video_jobs_total', status='completed')
             return True
             
         except Exception as e:
@@ -157,224 +1885,429 @@ class VideoProcessor:
             self.update_job_status(
                 job_id,
                 'failed',
-                last_error=str(e)
+                last_error=str(e),
+                attempts=True,
+                **self.timing_fields(timer, prepare_ms)
             )
+            METRICS.inc('video_jobs_total', status='failed')
             return False
         finally:
-            # Cleanup temporary files
-            self.cleanup_temp_files()
+            self.stage_timer = None
+            self.drop_lease(job_id)
+            if self.memory_budget:
+                self.memory_budget.release(job_id)
+            # Everything the job wrote locally lives in its scratch dir
+            if prepared:
+                self.remove_scratch_dir(prepared.get('scratch_dir'))
+    
+    def stage(self, name: str):
+        """Time a stage of the job being processed (no-op outside ``process_job``); starting one counts as progress"""
+        if self.stage_timer is None:
+            return nullcontext()
+        self.touch_job(self.stage_timer.job_id)
+        return self.stage_timer.stage(name)
+    
+    def timing_fields(self, timer: StageTimer, prepare_ms: int = 0) -> Dict:
+        """``processing_time_ms``/``stage_timings`` for update_job_status, plus a one-line JSON summary"""
+        processing_time_ms = timer.elapsed_ms() + int(prepare_ms)
+        self.logger.info("⏱️ " + json.dumps({
+            'event': 'job_timings', 'job_id': timer.job_id, 'processing_time_ms': processing_time_ms, 'stages': timer.timings
+        }))
+        return {'processing_time_ms': processing_time_ms, 'stage_timings': dict(timer.timings)}
     
-    def process_audio(self, audio_file: Optional[str]) -> Tuple[float, List[float]]:
-        """Process audio with librosa beat detection or fallback"""
-        if not audio_file:
+    def prepare_job(self, job: Dict) -> Dict:
+        """Run the I/O-bound part of a job: asset downloads and audio analysis
+
+        When an identical render already exists (same fingerprint), nothing is
+        downloaded and the result carries the stored output under ``reused``.
+        The result also carries the stages' ``stage_timings`` and ``prepare_ms``,
+        since a prefetcher runs this long before ``process_job``, and the job's
+        ``scratch_dir``, which belongs to whoever holds the result.
+        """
+        timer = StageTimer(job['id'], self.logger)
+        
+        def result(**fields) -> Dict:
+            return dict(fields, stage_timings=timer.timings, prepare_ms=timer.elapsed_ms())
+        
+        with timer.stage('dedup_lookup'):
+            image_ids = parse_id_array(job.get('image_ids'))
+            asset_rows = self.fetch_media_asset_rows(image_ids) if image_ids else {}
+            
+            fingerprint = self.compute_render_fingerprint(job, image_ids, asset_rows)
+            reused = self.get_render_output(fingerprint) if fingerprint else None
+        if reused:
+            return result(fingerprint=fingerprint, reused=reused)
+        
+        scratch_dir = self.create_scratch_dir(job['id'])
+        try:
+            with timer.stage('download'):
+                assets = self.download_assets(job, scratch_dir, asset_rows)
+            if not assets:
+                return result(assets=assets, fingerprint=fingerprint, scratch_dir=scratch_dir)
+            
+            # Analyse the track download_assets already fetched; never download it twice
+            # One librosa call can outlast the lease without any progress to report
+            with timer.stage('beat_detection'), self.job_busy(job['id']):
+                audio_duration, beat_times, decoded_audio = self.process_audio(
+                    assets.get('audio_path'),
+                    float(job['duration_target']) if job.get('duration_target') else None
+                )
+        except BaseException:
+            self.remove_scratch_dir(scratch_dir)
+            raise
+        return result(
+            assets=assets,
+            audio_duration=audio_duration,
+            beat_times=beat_times,
+            decoded_audio=decoded_audio,
+            fingerprint=fingerprint,
+            scratch_dir=scratch_dir
+        )
+    
+    def process_audio(
+        self,
+        audio_path: Optional[str],
+        duration_target: Optional[float] = None
+    ) -> Tuple[float, List[float], Optional[Tuple[np.ndarray, int]]]:
+        """Process audio with librosa beat detection or fallback
+
+        Returns ``(duration, beat_times, decoded_audio)`` where ``decoded_audio``
+        is ``(samples, sample_rate)`` with samples shaped ``(n, channels)`` when
+        the MoviePy backend will mux from them, so the track is decoded once.
+        """
+        if not audio_path:
             self.logger.warning("⚠️ No audio file provided, using default 30 seconds")
-            return 30.0, []  # Default 30 seconds, no beats
+            return 30.0, [], None  # Default 30 seconds, no beats
         
         try:
-            if LIBROSA_AVAILABLE:
-                return self.process_audio_with_librosa(audio_file)
+            if LIBROSA_AVAILABLE and self.config.get('beat_analysis_mode') == 'fast':
+                return self.process_audio_streaming(audio_path, duration_target)
+            elif LIBROSA_AVAILABLE:
+                return self.process_audio_with_librosa(audio_path)
             else:
-                return self.process_audio_fallback(audio_file)
+                return self.process_audio_fallback(audio_path)
         except Exception as e:
             self.logger.warning(f"⚠️ Audio processing failed, using fallback: {str(e)}")
-            return self.process_audio_fallback(audio_file)
+            return self.process_audio_fallback(audio_path)
     
-    def process_audio_with_librosa(self, audio_file: str) -> Tuple[float, List[float]]:
+    def process_audio_with_librosa(self, audio_path: str) -> Tuple[float, List[float], Optional[Tuple[np.ndarray, int]]]:
         """Advanced audio processing with librosa beat detection"""
         self.logger.info("🎵 Using librosa for beat detection")
         
-        # Download audio file
-        audio_path = self.download_audio_file(audio_file)
-        if not audio_path:
-            self.logger.error("❌ Failed to download audio file")
-            return 30.0, []
-        
         try:
-            # Load audio and detect beats
-            y, sr = librosa.load(audio_path)
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr, trim=False)
+            # Tenants reuse a handful of tracks: look the analysis up before decoding anything
+            content_hash = hash_file(audio_path)
+            cached = self.get_cached_audio_analysis(content_hash)
+            if cached:
+                duration, beat_times = cached
+                self.logger.info(f"⚡ Beat analysis cache hit: {len(beat_times)} beats in {duration:.2f}s audio")
+                return duration, beat_times, None
+            
+            sr = ANALYSIS_SAMPLE_RATE
+            decoded_audio = None
+            if self.config.get('render_backend', 'ffmpeg') == 'moviepy':
+                # MoviePy muxes from memory: decode once at the native rate/channels for the mux
+                # and analyse a resampled mono mix, exactly as a direct 22.05 kHz mono load would
+                y, native_sr = librosa.load(audio_path, sr=None, mono=False)
+                y = np.atleast_2d(y)
+                y_mono = librosa.resample(librosa.to_mono(y), orig_sr=native_sr, target_sr=sr)
+                decoded_audio = (y.T, native_sr)
+            else:
+                # ffmpeg muxes straight from the downloaded file; only the analysis signal is needed
+                y_mono, _ = librosa.load(audio_path, sr=sr, mono=True)
+            
+            # Detect beats
+            tempo, beats = librosa.beat.beat_track(y=y_mono, sr=sr, trim=False)
             
             # Calculate duration
-            duration = librosa.get_duration(y=y, sr=sr)
+            duration = librosa.get_duration(y=y_mono, sr=sr)
             
             # Convert beat frames to time stamps
             beat_times = librosa.frames_to_time(beats, sr=sr).tolist()
             
             self.logger.info(f"🎵 Detected {len(beat_times)} beats in {duration:.2f}s audio")
-            return duration, beat_times
+            self.store_audio_analysis(content_hash, duration, float(np.atleast_1d(tempo)[0]), beat_times)
+            return duration, beat_times, decoded_audio
         except Exception as e:
             self.logger.error(f"❌ Librosa processing failed: {str(e)}")
-            return 30.0, []
+            return 30.0, [], None
+    
+    def process_audio_streaming(
+        self,
+        audio_path: str,
+        duration_target: Optional[float] = None
+    ) -> Tuple[float, List[float], Optional[Tuple[np.ndarray, int]]]:
+        """Fast beat detection on a downsampled mono stream, decoding only up to ``duration_target``"""
+        self.logger.info("🎵 Using streaming beat detection (11 kHz mono)")
+        
+        content_hash = hash_file(audio_path)
+        # The analysed span depends on duration_target, so it is part of the cache key
+        version = f"{STREAMING_ANALYSIS_VERSION}:{duration_target or 0:g}"
+        cached = self.get_cached_audio_analysis(content_hash, version)
+        if cached:
+            duration, beat_times = cached
+            self.logger.info(f"⚡ Beat analysis cache hit: {len(beat_times)} beats in {duration:.2f}s audio")
+            return duration, beat_times, None
+        
+        duration, tempo, beat_times = detect_beats_streaming(audio_path, duration_target)
+        self.logger.info(f"🎵 Detected {len(beat_times)} beats in {duration:.2f}s audio ({tempo:.1f} BPM)")
+        self.store_audio_analysis(content_hash, duration, tempo, beat_times, version)
+        
+        # Nothing full-rate was decoded; the mux reads the downloaded file directly
+        return duration, beat_times, None
     
-    def process_audio_fallback(self, audio_file: str) -> Tuple[float, List[float]]:
+    def process_audio_fallback(self, audio_path: str) -> Tuple[float, List[float], Optional[Tuple[np.ndarray, int]]]:
         """Fallback audio processing without librosa"""
         self.logger.warning("⚠️ Using fallback audio processing (no beat detection)")
         
-        # Download audio file
-        audio_path = self.download_audio_file(audio_file)
-        if not audio_path:
-            self.logger.error("❌ Failed to download audio file")
-            return 30.0, []
-        
         try:
             # Use MoviePy for basic audio analysis
             audio_clip = AudioFileClip(audio_path)
             duration = audio_clip.duration
+            samples = audio_clip.to_soundarray(fps=44100)
+            audio_clip.close()
             
             # Generate simple beat intervals (every 2 seconds)
             beat_times = [i * 2.0 for i in range(int(duration // 2))]
             
             self.logger.info(f"🎵 Fallback: {duration:.2f}s audio, {len(beat_times)} beat intervals")
-            return duration, beat_times
+            return duration, beat_times, (samples, 44100)
         except Exception as e:
             self.logger.error(f"❌ Fallback audio processing failed: {str(e)}")
-            return 30.0, []
+            return 30.0, [], None
     
-    def create_composition(self, assets: Dict, audio_duration: float, beat_times: List[float], job: Dict) -> CompositeVideoClip:
+    def create_composition(
+        self,
+        assets: Dict,
+        audio_duration: float,
+        beat_times: List[float],
+        job: Dict,
+        profile: Optional[Dict] = None,
+        scratch_dir: Optional[str] = None
+    ) -> FrameCompositor:
         """Create 4-layer luxury golden frame composition"""
+        profile = profile or get_render_profile(job.get('quality_mode'))
+        size = profile['size']
+        self.logger.info(f"🎛️ Render profile '{profile['name']}': {size[0]}x{size[1]} @ {profile['fps']} fps")
         
-        # Layer Z=0: Background (Black #050505)
+        # Layer Z=0: Background (Black #050505) is the compositor's fill colour
         self.logger.info("🎨 Creating background layer (Black #050505)")
-        background = ColorClip((1080, 1920), color=(0x05, 0x05, 0x05)).set_duration(audio_duration)
         
-        # Layer Z=1: Atmosphere/Rain overlay
-        self.logger.info("🌧️ Creating atmosphere/rain overlay layer")
-        atmosphere = self.create_atmosphere_layer(audio_duration, assets)
+        # Layer Z=1: Atmosphere/Rain overlay (skipped when the profile disables effects)
+        atmosphere = None
+        if profile['effects']:
+            self.logger.info("🌧️ Creating atmosphere/rain overlay layer")
+            atmosphere = self.create_atmosphere_layer(audio_duration, assets, size, profile['fps'], scratch_dir)
         
         # Layer Z=2: Content (Product images with Ken Burns)
         self.logger.info("🖼️ Creating content layers with Ken Burns effect")
-        content_clips = self.create_content_layers(assets, audio_duration, beat_times)
+        content_layers = self.create_content_layers(assets, audio_duration, beat_times, profile)
         
-        # Layer Z=3: Golden Frame
-        self.logger.info("🏆 Creating golden frame overlay layer")
-        frame = self.create_golden_frame_layer(audio_duration, assets, job)
-        
-        # Layer Z=4: Text Hook
-        self.logger.info("📝 Creating text overlay layer")
-        text = self.create_text_layer(job.get('text_overlay', ''), audio_duration)
-        
-        # Composite all layers
-        clips = [background]
-        if atmosphere:
-            clips.append(atmosphere)
-        clips.extend(content_clips)
-        if frame:
-            clips.append(frame)
-        if text:
-            clips.append(text)
+        # Layers Z=3/Z=4: Golden frame + text hook, flattened once and cached
+        static_overlay = self.get_static_overlay(assets, job, profile)
         
         try:
-            final_composition = CompositeVideoClip(clips, size=(1080, 1920))
+            compositor = FrameCompositor(
+                size,
+                audio_duration,
+                profile['fps'],
+                atmosphere,
+                content_layers,
+                static_overlay
+            )
             self.logger.info("🎨 Created 4-layer composition with luxury golden frame")
-            return final_composition
+            return compositor
         except Exception as e:
             self.logger.error(f"❌ Composition creation failed: {str(e)}")
             # Return background as fallback
-            return background
+            return FrameCompositor(size, audio_duration, profile['fps'], None, [], None)
+    
+    def get_static_overlay(self, assets: Dict, job: Dict, profile: Dict) -> Optional[StaticOverlay]:
+        """Return the flattened frame+text overlay, building it once per (frame style, text, size)"""
+        size = profile['size']
+        text = job.get('text_overlay') or ''
+        frame_path = job.get('frame_overlay') or assets.get('frame_overlay')
+        frame_style = 'procedural'
+        if frame_path and os.path.exists(frame_path):
+            frame_style = hash_file(frame_path)
+        
+        key = (frame_style, text, size)
+        cached = self.static_layer_cache.get(key)
+        record_cache('static_layer', cached is not None)
+        if cached is not None:
+            self.static_layer_cache.move_to_end(key)
+            self.logger.info("⚡ Static layer cache hit (frame + text)")
+            return cached
+        
+        # Layer Z=3: Golden Frame
+        self.logger.info("🏆 Creating golden frame overlay layer")
+        rgba = self.create_golden_frame_layer(frame_path, size)
+        
+        # Layer Z=4: Text Hook
+        self.logger.info("📝 Creating text overlay layer")
+        text_layer = self.create_text_layer(text, profile['scale'])
+        if text_layer is not None:
+            alpha_over(rgba, *text_layer)
+        
+        overlay = StaticOverlay(rgba)
+        self.static_layer_cache[key] = overlay
+        while len(self.static_layer_cache) > int(self.config.get('static_layer_cache_entries', 8)):
+            self.static_layer_cache.popitem(last=False)
+        return overlay
     
-    def create_atmosphere_layer(self, duration: float, assets: Dict) -> Optional[VideoClip]:
-        """Create atmosphere/rain overlay layer"""
+    def create_atmosphere_layer(
+        self,
+        duration: float,
+        assets: Dict,
+        size: Tuple[int, int] = OUTPUT_SIZE,
+        fps: int = 30,
+        scratch_dir: Optional[str] = None
+    ) -> Optional[AtmosphereLoop]:
+        """Create atmosphere/rain overlay layer (prepared once per source, size and fps)
+
+        A stored overlay (``resolve_overlay_asset``) is keyed by its ETag and
+        only downloaded when its prepared loop has to be built; the bundled
+        default asset is keyed by its content hash. Without an asset cache the
+        loop is prepared in ``scratch_dir``, for this job only.
+        """
         try:
             # Look for glitter/rain overlay asset
-            overlay_path = assets.get('glitter_overlay')
-            if not overlay_path:
+            overlay = assets.get('glitter_overlay')
+            if overlay:
+                source_id = f"etag:{overlay['etag']}"
+                overlay_path = None
+                self.logger.info(f"🌧️ Using atmosphere overlay: {overlay['remote_path']}")
+            else:
                 overlay_path = self.get_default_asset('glitter-rain.mp4')
+                if not overlay_path or not os.path.exists(overlay_path):
+                    self.logger.warning("⚠️ No atmosphere overlay found, skipping")
+                    return None
+                source_id = hash_file(overlay_path)
+                self.logger.info(f"🌧️ Using atmosphere overlay: {overlay_path}")
+            
+            key = AtmosphereLoop.cache_key(source_id, size, fps, ATMOSPHERE_OPACITY)
+            loop = self.atmosphere_loops.get(key)
+            if loop is not None:
+                try:
+                    os.utime(loop.path)  # A hit for the cache's LRU eviction, like any other entry
+                    self.logger.info("⚡ Atmosphere loop already mapped")
+                    record_cache('atmosphere', True)
+                    return loop
+                except FileNotFoundError:
+                    del self.atmosphere_loops[key]  # Evicted; prepare it again
+            
+            def prepare(tmp_path: str):
+                self.logger.info(f"🌧️ Preparing atmosphere loop at {size[0]}x{size[1]} @ {fps} fps")
+                if overlay_path:
+                    AtmosphereLoop.prepare(overlay_path, tmp_path, size, fps, ATMOSPHERE_OPACITY)
+                    return
+                source_path = f"{tmp_path}.source.part"
+                try:
+                    self.download_from_storage(overlay['remote_path'], source_path)
+                    AtmosphereLoop.prepare(source_path, tmp_path, size, fps, ATMOSPHERE_OPACITY)
+                finally:
+                    if os.path.exists(source_path):
+                        os.remove(source_path)
             
-            if overlay_path and os.path.exists(overlay_path):
-                self.logger.info(f"🌧️ Using atmosphere overlay: {overlay_path}")
-                overlay = VideoFileClip(overlay_path)
-                # Resize to 1080x1920 and loop if necessary
-                if overlay.duration < duration:
-                    overlay = overlay.loop(duration=duration)
-                overlay = overlay.resize((1080, 1920))
-                return overlay.set_opacity(0.7)  # 70% opacity
+            if self.asset_cache is not None:
+                path, hit = self.asset_cache.get_or_fetch(key, '.npy', prepare)
+                if hit:
+                    self.logger.info("⚡ Atmosphere loop cache hit")
             else:
-                self.logger.warning("⚠️ No atmosphere overlay found, skipping")
-                return None
+                # No shared cache: the loop lives in the job's scratch dir and goes away with it
+                path = os.path.join(scratch_dir or tempfile.gettempdir(), f"atmosphere_{key}.npy")
+                hit = os.path.exists(path)
+                if not hit:
+                    tmp_path = f"{path}.{os.getpid()}.part"
+                    prepare(tmp_path)
+                    os.replace(tmp_path, path)
+            
+            record_cache('atmosphere', hit)
+            loop = AtmosphereLoop(path, fps)
+            self.atmosphere_loops[key] = loop
+            self.logger.info(f"🌧️ Atmosphere loop: {loop.frame_count} frames ({loop.frame_count / fps:.1f}s)")
+            return loop
         except Exception as e:
             self.logger.warning(f"⚠️ Failed to create atmosphere layer: {str(e)}")
         return None
     
-    def create_content_layers(self, assets: Dict, duration: float, beat_times: List[float]) -> List[VideoClip]:
-        """Create content layers with Ken Burns effect"""
-        content_clips = []
+    def create_content_layers(
+        self,
+        assets: Dict,
+        duration: float,
+        beat_times: List[float],
+        profile: Optional[Dict] = None
+    ) -> List[KenBurnsLayer]:
+        """Create content layers with Ken Burns effect (static images when effects are off)"""
+        profile = profile or get_render_profile('normal')
+        content_layers = []
         
         # Get product images
         images = assets.get('product_images', [])
         if not images:
             self.logger.warning("⚠️ No product images found")
-            return content_clips
+            return content_layers
         
         # Calculate clip duration based on beats or equal distribution
         if beat_times:
             clip_duration = self.calculate_beat_based_durations(beat_times, len(images))
         else:
-            clip_duration = duration / len(images)
+            clip_duration = [duration / len(images)] * len(images)
         
+        start_time = 0.0
         for i, image_path in enumerate(images):
             try:
                 self.logger.info(f"🖼️ Processing content image {i+1}/{len(images)}: {image_path}")
                 
-                # Load and resize image to fit inside frame (900x1600)
-                img = ImageClip(image_path)
-                if img.size[0] > 900 or img.size[1] > 1600:
-                    img = img.resize((900, 1600))
-                
-                # Apply Ken Burns zoom effect (1.0 -> 1.05)
-                zoom_clip = img.resize(lambda t: (
-                    900 * (1 + 0.05 * t), 
-                    1600 * (1 + 0.05 * t)
+                # Fit inside frame (900x1600 at full scale) and zoom 1.0 -> 1.05 over the clip
+                content_layers.append(KenBurnsLayer(
+                    image_path,
+                    start_time,
+                    clip_duration[i],
+                    profile['content_size'],
+                    animate=profile['effects']
                 ))
-                
-                # Set duration and position (centered)
-                start_time = sum(clip_duration[:i]) if i > 0 else 0
-                clip = zoom_clip.set_duration(clip_duration[i]).set_position(('center', 'center'))
-                
-                content_clips.append(clip.set_start(start_time))
-                
             except Exception as e:
                 self.logger.error(f"❌ Failed to process image {image_path}: {str(e)}")
+            start_time += clip_duration[i]
         
-        return content_clips
+        return content_layers
     
-    def create_golden_frame_layer(self, duration: float, assets: Dict, job: Dict) -> Optional[VideoClip]:
-        """Create golden frame overlay layer"""
+    def create_golden_frame_layer(self, frame_path: Optional[str], size: Tuple[int, int] = OUTPUT_SIZE) -> np.ndarray:
+        """Create golden frame overlay layer as an RGBA array"""
         try:
-            # Check for custom frame overlay
-            frame_path = job.get('frame_overlay') or assets.get('frame_overlay')
-            
             if frame_path and os.path.exists(frame_path):
                 # Use custom frame overlay
                 self.logger.info(f"🏆 Using custom frame overlay: {frame_path}")
-                frame = ImageClip(frame_path).resize((1080, 1920))
-                return frame.set_duration(duration)
+                with Image.open(frame_path) as frame:
+                    return np.array(frame.convert('RGBA').resize(size, Image.LANCZOS))
             else:
                 # Create procedural golden frame
                 self.logger.info("🏆 Creating procedural golden frame")
-                return self.create_procedural_golden_frame(duration)
+                return self.create_procedural_golden_frame(size)
                 
         except Exception as e:
             self.logger.warning(f"⚠️ Failed to create golden frame: {str(e)}")
-        return None
+        return np.zeros((size[1], size[0], 4), dtype=np.uint8)
     
-    def create_procedural_golden_frame(self, duration: float) -> VideoClip:
-        """Create procedural golden frame with margin"""
-        try:
-            # Create transparent clip with golden border
-            transparent = ColorClip((1080, 1920), color=(0, 0, 0, 0)).set_duration(duration)
-            
-            # Add 10px gold border (#D4AF37)
-            gold_frame = margin(transparent, 10, color=(0xD4, 0xAF, 0x37))
-            
-            self.logger.info("🏆 Created procedural golden frame")
-            return gold_frame
-        except Exception as e:
-            self.logger.error(f"❌ Failed to create procedural golden frame: {str(e)}")
-            # Return transparent clip as fallback
-            return ColorClip((1080, 1920), color=(0, 0, 0, 0)).set_duration(duration)
+    def create_procedural_golden_frame(self, size: Tuple[int, int] = OUTPUT_SIZE) -> np.ndarray:
+        """Create procedural golden frame: a gold border around a transparent canvas"""
+        width, height = size
+        rgba = np.zeros((height, width, 4), dtype=np.uint8)
+        
+        # 10px gold border (#D4AF37) at full scale
+        border = max(2, int(round(10 * width / OUTPUT_SIZE[0])))
+        gold = (*GOLD_COLOR, 255)
+        rgba[:border, :] = gold
+        rgba[-border:, :] = gold
+        rgba[:, :border] = gold
+        rgba[:, -border:] = gold
+        
+        self.logger.info("🏆 Created procedural golden frame")
+        return rgba
     
-    def create_text_layer(self, text: str, duration: float) -> Optional[TextClip]:
-        """Create viral text hook overlay"""
+    def create_text_layer(self, text: str, scale: float = 1.0) -> Optional[Tuple[np.ndarray, Tuple[int, int]]]:
+        """Create viral text hook overlay as ``(rgba, (x, y))``"""
         if not text:
             self.logger.info("📝 No text overlay provided")
             return None
@@ -383,72 +2316,337 @@ class VideoProcessor:
             self.logger.info(f"📝 Creating text overlay: {text[:50]}...")
             
             # Create text with ImageMagick compatibility
+            banner_size = scale_size((1080, 200), scale)  # Top banner area
             txt_clip = TextClip(
                 text,
-                fontsize=60,
+                fontsize=int(60 * scale),
                 color='white',
                 font='Arial-Bold',
                 stroke_color='black',
-                stroke_width=2,
+                stroke_width=max(1, int(round(2 * scale))),
                 method='caption',  # Compatible with ImageMagick
-                size=(1080, 200)  # Top banner area
-            ).set_duration(duration).set_position(('center', 100))
+                size=banner_size
+            )
+            rgb = txt_clip.get_frame(0)
+            alpha = txt_clip.mask.get_frame(0) if txt_clip.mask is not None else np.ones(rgb.shape[:2])
+            rgba = np.dstack([rgb, (alpha * 255).round()]).astype(np.uint8)
+            
+            # Centered horizontally, 100px from the top at full scale
+            position = ((scale_size(OUTPUT_SIZE, scale)[0] - rgba.shape[1]) // 2, int(100 * scale))
             
             self.logger.info("✅ Text overlay created successfully")
-            return txt_clip
+            return rgba, position
             
         except Exception as e:
             self.logger.error(f"❌ Failed to create text layer: {str(e)}")
         return None
     
-    def generate_output(self, video_clip: CompositeVideoClip, job_id: str, tenant_id: str) -> Tuple[str, str]:
-        """Generate final video and thumbnail"""
+    def generate_output(
+        self,
+        compositor: FrameCompositor,
+        job_id: str,
+        tenant_id: str,
+        scratch_dir: str,
+        audio_path: Optional[str] = None,
+        decoded_audio: Optional[Tuple[np.ndarray, int]] = None,
+        profile: Optional[Dict] = None
+    ) -> Tuple[str, str, Optional[str]]:
+        """Generate final video, thumbnail and optional preview in ``scratch_dir``; returns their URLs"""
+        profile = profile or get_render_profile('normal')
         try:
             self.logger.info("📹 Generating output video and thumbnail")
             
-            # Add audio if available
-            if hasattr(video_clip, 'audio') and video_clip.audio is not None:
-                final_video = video_clip
-            else:
-                # Add silent audio track for compatibility
-                self.logger.info("🔇 Adding silent audio track for compatibility")
-                silent_audio = AudioClip([[0, 0]], fps=44100, duration=video_clip.duration)
-                final_video = video_clip.set_audio(silent_audio)
-            
             # Generate output paths
-            video_path = f"/tmp/video_{job_id}.mp4"
-            thumbnail_path = f"/tmp/thumb_{job_id}.jpg"
+            video_path = os.path.join(scratch_dir, 'video.mp4')
+            thumbnail_path = os.path.join(scratch_dir, 'thumbnail.jpg')
             
-            # Write video file with proper encoding
-            self.logger.info(f"💾 Writing video to: {video_path}")
-            final_video.write_videofile(
-                video_path,
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile='temp-audio.m4a',
-                remove_temp=True,
-                verbose=False,
-                logger=None,  # Disable MoviePy's logging to avoid encoding issues
-                threads=4  # Use multiple threads for faster processing
+            # Thumbnail (frame at 1 second) and preview are taken from frames the encoder renders anyway
+            capture = FrameCapture(
+                compositor.frame_count,
+                compositor.fps,
+                thumbnail_time=min(1.0, compositor.duration / 2),
+                preview_mode=self.config.get('preview_mode', 'none')
             )
             
-            # Generate thumbnail
-            self.logger.info(f"🖼️ Generating thumbnail: {thumbnail_path}")
-            final_video.save_frame(thumbnail_path, t=1.0)  # Frame at 1 second
+            video_key = f"videos/{tenant_id}/{job_id}.mp4"
+            video_url = None
+            
+            # Encoding covers 25-90% of the job's reported progress; the frame counter and fps
+            # gauge follow the same callback, so a scrape mid-render sees the current encode
+            frames_counted = 0
+            
+            def encode_progress(frames_done: int):
+                nonlocal frames_counted
+                self.report_progress(job_id, 25 + 65 * frames_done // max(compositor.frame_count, 1))
+                METRICS.inc('video_frames_encoded_total', frames_done - frames_counted)
+                METRICS.set('video_encode_fps', frames_done / max(time.monotonic() - encode_started, 1e-6), quality_mode=profile['name'])
+                frames_counted = frames_done
+            
+            # Write video file with proper encoding
+            segments = self.segment_plan(compositor)
+            encode_started = time.monotonic()
+            with self.stage('encode'):
+                if self.config.get('render_backend', 'ffmpeg') == 'moviepy':
+                    self.logger.info(f"💾 Writing video to: {video_path}")
+                    self.write_with_moviepy(compositor, video_path, audio_path, decoded_audio, profile, capture, encode_progress)
+                elif len(segments) > 1:
+                    self.logger.info(f"💾 Writing video to: {video_path}")
+                    self.write_segmented(compositor, video_path, audio_path, profile, segments, capture, encode_progress)
+                else:
+                    upload = self.start_streaming_upload(video_key) if self.config.get('s3_stream_upload') else None
+                    if upload is not None:
+                        self.logger.info(f"💾 Streaming fragmented MP4 to: {video_key}")
+                        try:
+                            self.write_with_ffmpeg_pipe(compositor, None, audio_path, profile, capture, upload, encode_progress)
+                            upload.complete()
+                        except BaseException:
+                            upload.abort()
+                            raise
+                        video_url = self.storage_url(video_key)
+                        self.logger.info(f"✅ Uploaded {upload.bytes_written / (1024 * 1024):.1f} MB while encoding")
+                        METRICS.inc('video_s3_bytes_total', upload.bytes_written, direction='upload')
+                    else:
+                        self.logger.info(f"💾 Writing video to: {video_path}")
+                        self.write_with_ffmpeg_pipe(compositor, video_path, audio_path, profile, capture, progress=encode_progress)
+            encode_seconds = time.monotonic() - encode_started
+            METRICS.inc('video_frames_encoded_total', compositor.frame_count - frames_counted)
+            METRICS.set('video_encode_fps', compositor.frame_count / max(encode_seconds, 1e-6), quality_mode=profile['name'])
+            self.report_progress(job_id, 90)
+            
+            self.logger.info(f"🖼️ Saving thumbnail: {thumbnail_path}")
+            with self.stage('thumbnail'):
+                if not capture.save_thumbnail(thumbnail_path):
+                    Image.fromarray(compositor.render_into(capture.thumbnail_index / compositor.fps, compositor.buffer)).save(thumbnail_path, quality=90)
+                preview_path = capture.save_preview(os.path.join(scratch_dir, 'preview'))
             
-            # Upload to storage
-            video_url = self.upload_to_storage(video_path, f"videos/{tenant_id}/{job_id}.mp4", tenant_id)
-            thumbnail_url = self.upload_to_storage(thumbnail_path, f"thumbnails/{tenant_id}/{job_id}.jpg", tenant_id)
+            # Upload to storage: video, thumbnail and preview go up concurrently on the shared client
+            with self.stage('upload'), ThreadPoolExecutor(max_workers=3, thread_name_prefix='upload') as pool:
+                video_future = None
+                if video_url is None:
+                    video_future = pool.submit(self.upload_to_storage, video_path, video_key, tenant_id, job_id)
+                thumbnail_future = pool.submit(self.upload_to_storage, thumbnail_path, f"thumbnails/{tenant_id}/{job_id}.jpg", tenant_id, job_id)
+                preview_future = None
+                if preview_path:
+                    preview_ext = os.path.splitext(preview_path)[1]
+                    preview_future = pool.submit(self.upload_to_storage, preview_path, f"previews/{tenant_id}/{job_id}{preview_ext}", tenant_id, job_id)
+                
+                if video_future is not None:
+                    video_url = video_future.result()
+                thumbnail_url = thumbnail_future.result()
+                preview_url = preview_future.result() if preview_future is not None else None
             
             self.logger.info(f"✅ Generated video: {video_url}")
             self.logger.info(f"✅ Generated thumbnail: {thumbnail_url}")
+            if preview_url:
+                self.logger.info(f"✅ Generated preview: {preview_url}")
             
-            return video_url, thumbnail_url
+            return video_url, thumbnail_url, preview_url
             
         except Exception as e:
             self.logger.error(f"❌ Failed to generate output: {str(e)}")
             raise
     
+    def encoder_args(self, profile: Dict) -> List[str]:
+        """x264 rate control and pixel format for a render profile (the preset is passed separately)"""
+        args = ['-crf', str(profile['crf']), '-pix_fmt', 'yuv420p']
+        if profile['tune']:
+            args += ['-tune', profile['tune']]
+        return args
+    
+    def audio_input_args(self, audio_path: Optional[str]) -> List[str]:
+        """ffmpeg input options for the soundtrack (the second input of every output mux)"""
+        if audio_path and os.path.exists(audio_path):
+            self.logger.info(f"🎵 Muxing soundtrack ({audio_path})")
+            return ['-i', audio_path]
+        # Add silent audio track for compatibility
+        self.logger.info("🔇 Adding silent audio track for compatibility")
+        return ['-f', 'lavfi', '-i', 'anullsrc=channel_layout=stereo:sample_rate=44100']
+    
+    def write_with_ffmpeg_pipe(
+        self,
+        compositor: FrameCompositor,
+        video_path: str,
+        audio_path: Optional[str],
+        profile: Dict,
+        capture: Optional[FrameCapture] = None,
+        upload: Optional[StreamingMultipartUpload] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ):
+        """Stream raw RGB frames into ffmpeg's stdin and mux the soundtrack in the same process
+
+        With ``upload`` ffmpeg writes a fragmented MP4 to stdout instead of
+        ``video_path`` (a pipe cannot be rewound for +faststart), and the bytes
+        go straight into the multipart upload while encoding continues.
+        """
+        command = [FFMPEG_BINARY, '-v', 'error', '-y'] + raw_video_input_args(compositor.size, compositor.fps)
+        command += self.audio_input_args(audio_path)
+        command += ['-map', '0:v:0', '-map', '1:a:0', '-c:v', 'libx264', '-preset', profile['preset']]
+        command += self.encoder_args(profile)
+        command += ['-c:a', 'aac', '-t', f"{compositor.duration:.3f}"]
+        if upload is not None:
+            command += ['-movflags', '+frag_keyframe+empty_moov+default_base_moof', '-f', 'mp4', 'pipe:1']
+        else:
+            command += ['-movflags', '+faststart', video_path]
+        
+        stream_frames_to_ffmpeg(
+            command, compositor, 0, compositor.frame_count, capture,
+            output_sink=upload.write if upload is not None else None,
+            progress=progress
+        )
+        self.logger.info(f"🎞️ Encoded {compositor.frame_count} frames through the ffmpeg pipe")
+    
+    def segment_plan(self, compositor: FrameCompositor) -> List[Tuple[int, int]]:
+        """Frame ranges to render in parallel, or a single range when segmenting does not pay off"""
+        workers = int(self.config.get('segment_workers', 0))
+        if workers < 2 or compositor.duration < float(self.config.get('segment_min_duration', 20)):
+            return [(0, compositor.frame_count)]
+        cut_times = [layer.start for layer in compositor.content_layers]
+        return plan_segments(cut_times, compositor.duration, compositor.fps, workers)
+    
+    def write_segmented(
+        self,
+        compositor: FrameCompositor,
+        video_path: str,
+        audio_path: Optional[str],
+        profile: Dict,
+        segments: List[Tuple[int, int]],
+        capture: Optional[FrameCapture] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ):
+        """Render clip-aligned segments in a process pool, then stream-copy concat and mux audio once
+
+        Pool workers are forked after the compositor is built, so they share
+        its flattened overlay and atmosphere mapping instead of rebuilding
+        them; each decodes only the image layers of its own segment.
+        Each segment is a standalone H.264 stream; the concat demuxer joins
+        them without re-encoding and the soundtrack is encoded in that pass.
+        ``progress`` gets the frames written across all segments, polled once
+        per second while they render.
+        """
+        global _SEGMENT_COMPOSITOR, _SEGMENT_FRAMES
+        segment_dir = tempfile.mkdtemp(prefix='segments-', dir=os.path.dirname(video_path))
+        # Split the cores between the concurrent x264 instances instead of oversubscribing
+        encoder_threads = max(1, (os.cpu_count() or 1) // len(segments))
+        base_command = [FFMPEG_BINARY, '-v', 'error', '-y'] + raw_video_input_args(compositor.size, compositor.fps)
+        base_command += ['-an', '-c:v', 'libx264', '-preset', profile['preset'], '-threads', str(encoder_threads)]
+        base_command += self.encoder_args(profile)
+        
+        self.logger.info(f"🧩 Rendering {len(segments)} segments in parallel: {segments}")
+        try:
+            segment_paths = [os.path.join(segment_dir, f"segment_{index:03d}.mp4") for index in range(len(segments))]
+            fork_context = multiprocessing.get_context('fork')
+            _SEGMENT_COMPOSITOR = compositor
+            _SEGMENT_FRAMES = fork_context.Value('q', 0)
+            try:
+                # fork, not spawn/forkserver: the compositor holds memory maps and a flattened overlay that
+                # would otherwise be pickled into every child, and this file (hyphenated, also loaded by path
+                # from the bench) cannot be re-imported by name. _init_segment_worker covers fork safety
+                with ProcessPoolExecutor(
+                    max_workers=len(segments),
+                    mp_context=fork_context,
+                    initializer=_init_segment_worker
+                ) as pool:
+                    futures = [
+                        pool.submit(_render_segment, base_command + [path], start, end, capture)
+                        for path, (start, end) in zip(segment_paths, segments)
+                    ]
+                    while wait(futures, timeout=1.0).not_done:
+                        if progress is not None:
+                            progress(_SEGMENT_FRAMES.value)
+                    captures = [future.result() for future in futures]
+                    if progress is not None:
+                        progress(_SEGMENT_FRAMES.value)
+            finally:
+                _SEGMENT_COMPOSITOR = None
+                _SEGMENT_FRAMES = None
+            
+            if capture is not None:
+                for segment_capture in captures:
+                    capture.merge(segment_capture)
+            
+            list_path = os.path.join(segment_dir, 'segments.txt')
+            with open(list_path, 'w') as f:
+                f.writelines(f"file '{path}'\n" for path in segment_paths)
+            
+            command = [FFMPEG_BINARY, '-v', 'error', '-y', '-f', 'concat', '-safe', '0', '-i', list_path]
+            command += self.audio_input_args(audio_path)
+            command += ['-map', '0:v:0', '-map', '1:a:0', '-c:v', 'copy', '-c:a', 'aac']
+            command += ['-t', f"{compositor.duration:.3f}", '-movflags', '+faststart', video_path]
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if result.returncode != 0:
+                raise RuntimeError(f"ffmpeg concat exited with {result.returncode}: {result.stderr.decode(errors='replace')[-2000:]}")
+            self.logger.info(f"🎞️ Encoded {compositor.frame_count} frames in {len(segments)} segments")
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+    
+    def write_with_moviepy(
+        self,
+        compositor: FrameCompositor,
+        video_path: str,
+        audio_path: Optional[str],
+        decoded_audio: Optional[Tuple[np.ndarray, int]],
+        profile: Dict,
+        capture: Optional[FrameCapture] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ):
+        """Encode through MoviePy's write_videofile (VIDEO_RENDER_BACKEND=moviepy)
+
+        ``progress`` is called once per second of video, like the ffmpeg pipe's.
+        """
+        def on_frame(index: int, frame: np.ndarray):
+            if capture is not None:
+                capture.observe(index, frame)
+            if progress is not None and (index + 1) % compositor.fps == 0:
+                progress(index + 1)
+        
+        video_clip = compositor.to_clip(on_frame)
+        
+        # Add audio if available
+        soundtrack = self.load_soundtrack(audio_path, decoded_audio, video_clip.duration)
+        if soundtrack is not None:
+            final_video = video_clip.set_audio(soundtrack)
+        else:
+            # Add silent audio track for compatibility
+            self.logger.info("🔇 Adding silent audio track for compatibility")
+            silent_audio = AudioClip(lambda t: np.zeros((np.size(t), 2)), fps=44100, duration=video_clip.duration)
+            final_video = video_clip.set_audio(silent_audio)
+        
+        final_video.write_videofile(
+            video_path,
+            fps=profile['fps'],
+            codec='libx264',
+            preset=profile['preset'],
+            ffmpeg_params=self.encoder_args(profile),
+            audio_codec='aac',
+            temp_audiofile=os.path.join(os.path.dirname(video_path), 'temp-audio.m4a'),  # In the job's scratch dir
+            remove_temp=True,
+            verbose=False,
+            logger=None,  # Disable MoviePy's logging to avoid encoding issues
+            threads=4  # Use multiple threads for faster processing
+        )
+    
+    def load_soundtrack(
+        self,
+        audio_path: Optional[str],
+        decoded_audio: Optional[Tuple[np.ndarray, int]],
+        duration: float
+    ) -> Optional[AudioClip]:
+        """Build the output soundtrack, reusing samples decoded during beat analysis"""
+        try:
+            if decoded_audio is not None:
+                samples, sample_rate = decoded_audio
+                soundtrack = AudioArrayClip(samples, fps=sample_rate)
+            elif audio_path:
+                soundtrack = AudioFileClip(audio_path)
+            else:
+                return None
+            
+            self.logger.info(f"🎵 Muxing soundtrack ({'shared samples' if decoded_audio is not None else audio_path})")
+            return soundtrack.subclip(0, min(duration, soundtrack.duration))
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to load soundtrack, output will be silent: {str(e)}")
+            return None
+    
     def calculate_beat_based_durations(self, beat_times: List[float], num_images: int) -> List[float]:
         """Calculate clip durations based on beat times"""
         if not beat_times or num_images == 0:
@@ -483,14 +2681,321 @@ class VideoProcessor:
             self.logger.error(f"❌ Database query failed: {str(e)}")
             return None
     
-    def update_job_status(self, job_id: str, status: str, **kwargs):
-        """Update job status in database"""
+    def claim_next_job(self) -> Optional[Dict]:
+        """Atomically claim the next pending job and mark it as processing
+
+        The row is selected with ``FOR UPDATE SKIP LOCKED`` and flipped to
+        'processing' in the same statement, so concurrent workers can never
+        claim the same job. The claim takes a lease that the status writer
+        renews until the job is finished or released.
+        
+        With VIDEO_SCHEDULER=fair (default) the job comes from the tenant
+        chosen by ``FAIR_CLAIM_QUERY``; ``fifo`` is the plain global
+        priority/age order.
+        
+        With a ``memory_budget`` only quality modes whose estimate fits the
+        room left are considered, and the claimed job's reservation is taken
+        before it is returned; ``memory_blocked`` tells the caller that jobs
+        may have been passed over for lack of memory.
+        """
+        if not self.db_conn:
+            self.logger.error("❌ Database connection not available")
+            return None
+        
+        quality_modes = None
+        if self.memory_budget:
+            quality_modes = self.memory_budget.claimable_modes(self.config)
+            self.memory_blocked = quality_modes is not None
+            if quality_modes == []:
+                return None
+        
+        params = {
+            'quality_modes': quality_modes,
+            'worker_id': self.worker_id,
+            'lease_seconds': float(self.config.get('lease_seconds', 60)),
+            'credit': float(self.config.get('fair_credit_seconds', 120)),
+            'max_in_flight': int(self.config.get('tenant_max_in_flight', 0)),
+            'aging': max(float(self.config.get('priority_aging_seconds', 600)), 1.0)
+        }
+        if self.config.get('scheduler', 'fair') == 'fair':
+            query = FAIR_CLAIM_QUERY
+        else:
+            query = """
+                UPDATE video_processing_jobs
+                SET status = 'processing', started_at = NOW(), updated_at = NOW(), progress = 0,
+                    worker_id = %(worker_id)s, heartbeat_at = NOW(),
+                    lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s)
+                WHERE id IN (
+                    SELECT id FROM video_processing_jobs
+                    WHERE status = 'pending'
+                      AND (%(quality_modes)s::text[] IS NULL OR quality_mode = ANY(%(quality_modes)s))
+                    ORDER BY priority DESC, created_at ASC
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+            """
+        try:
+            with self.db_conn.cursor() as cursor:
+                cursor.execute(query, params)
+                job = cursor.fetchone()
+        except Exception as e:
+            if getattr(e, 'pgcode', None) == '42P01' and query is FAIR_CLAIM_QUERY:  # undefined_table
+                self.logger.error("❌ video_tenant_scheduling is missing (migration 0029), falling back to FIFO claims")
+                self.config['scheduler'] = 'fifo'
+                return self.claim_next_job()
+            self.logger.error(f"❌ Failed to claim job: {str(e)}")
+            raise
+        
+        if job:
+            self.hold_lease(job['id'])
+            if self.memory_budget and not self.memory_budget.reserve(job, self.config):
+                # Another worker took the room between the budget check and the claim
+                self.memory_blocked = True
+                METRICS.inc('video_jobs_deferred_total')
+                self.release_job(job['id'])
+                return None
+        return job
+    
+    def get_cached_audio_analysis(
+        self,
+        content_hash: str,
+        version: str = AUDIO_ANALYSIS_VERSION
+    ) -> Optional[Tuple[float, List[float]]]:
+        """Look up a stored beat analysis for an audio file's content hash"""
+        if not self.db_conn:
+            return None
+        
+        query = """
+            SELECT duration, beat_times FROM video_audio_analysis
+            WHERE content_hash = %s AND analysis_version = %s
+        """
+        try:
+            with self.db_conn.cursor() as cursor:
+                cursor.execute(query, (content_hash, version))
+                row = cursor.fetchone()
+            record_cache('beat_analysis', row is not None)
+            if not row:
+                return None
+            return float(row['duration']), [float(t) for t in row['beat_times']]
+        except Exception as e:
+            self.logger.warning(f"⚠️ Beat analysis cache lookup failed: {str(e)}")
+            return None
+    
+    def store_audio_analysis(
+        self,
+        content_hash: str,
+        duration: float,
+        tempo: float,
+        beat_times: List[float],
+        version: str = AUDIO_ANALYSIS_VERSION
+    ):
+        """Persist a beat analysis so later jobs with the same track skip decoding"""
+        if not self.db_conn:
+            return
+        
+        query = """
+            INSERT INTO video_audio_analysis (content_hash, analysis_version, duration, tempo, beat_times)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (content_hash, analysis_version) DO NOTHING
+        """
+        try:
+            with self.db_conn.cursor() as cursor:
+                cursor.execute(query, (content_hash, version, duration, tempo, json.dumps(beat_times)))
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to store beat analysis: {str(e)}")
+    
+    def compute_render_fingerprint(self, job: Dict, image_ids: List[str], asset_rows: Dict[str, Dict]) -> Optional[str]:
+        """Fingerprint a job's render plan, or None when deduplication is off or an input has no content identity"""
+        if not self.config.get('render_dedup', True):
+            return None
+        
+        image_hashes = []
+        for image_id in image_ids:
+            row = asset_rows.get(image_id)
+            if not row or not row.get('content_hash'):
+                return None
+            image_hashes.append(row['content_hash'])
+        
+        # The soundtrack and the frame/atmosphere assets are identified by their storage
+        # ETags: the lookup happens before anything is downloaded
+        remote_paths = {}
+        if job.get('audio_file'):
+            remote_paths['audio'] = f"audio/{job['audio_file']}"
+        if job.get('overlay_type', 'golden-frame') == 'golden-frame':
+            remote_paths['frame'] = 'frames/golden-frame.png'
+            remote_paths['atmosphere'] = 'overlays/glitter-rain.mp4'
+        etags = {}
+        for name, remote_path in remote_paths.items():
+            try:
+                head = self.s3_client.head_object(Bucket=self.config.get('s3_bucket'), Key=remote_path)
+                etags[name] = head['ETag'].strip('"')
+            except Exception as e:
+                if name == 'audio':
+                    self.logger.debug(f"Render dedup skipped, audio not identifiable: {str(e)}")
+                    return None
+                etags[name] = None  # Not in storage: the render falls back to the bundled default
+        
+        settings = {
+            'beat_analysis': self.config.get('beat_analysis_mode', 'full'),
+            'preview': self.config.get('preview_mode', 'none')
+        }
+        overlay_etags = {name: etags[name] for name in ('frame', 'atmosphere') if name in etags}
+        return render_fingerprint(job, image_hashes, etags.get('audio'), settings, overlay_etags)
+    
+    def get_render_output(self, fingerprint: str) -> Optional[Dict]:
+        """Look up the stored output of an identical render"""
+        if not self.db_conn:
+            return None
+        
+        query = """
+            SELECT source_job_id::text AS source_job_id, output_video_url, output_thumbnail_url, output_preview_url
+            FROM video_render_outputs
+            WHERE fingerprint = %s
+        """
+        try:
+            with self.db_conn.cursor() as cursor:
+                cursor.execute(query, (fingerprint,))
+                row = cursor.fetchone()
+            record_cache('render_output', row is not None)
+            return row
+        except Exception as e:
+            self.logger.warning(f"⚠️ Render output lookup failed: {str(e)}")
+            return None
+    
+    def store_render_output(self, fingerprint: str, job: Dict):
+        """Record a finished render so identical jobs can reuse it
+
+        The row is copied from the job itself and only once this worker's
+        'completed' update has landed: it goes through the status writer
+        behind that update, and a completion dropped because the lease was
+        lost leaves nothing to copy.
+        """
+        if not self.db_conn:
+            return
+        
+        query = """
+            INSERT INTO video_render_outputs
+              (fingerprint, tenant_id, source_job_id, output_video_url, output_thumbnail_url, output_preview_url)
+            SELECT %s, j.tenant_id, j.id, j.output_video_url, j.output_thumbnail_url, j.output_preview_url
+            FROM video_processing_jobs j
+            WHERE j.id = %s AND j.status = 'completed' AND j.worker_id = %s
+            ON CONFLICT (fingerprint) DO NOTHING
+        """
+        values = [fingerprint, job['id'], self.worker_id]
+        if self.status_writer is not None and self.config.get('async_status_writes', True):
+            self.status_writer.submit(query, values)
+            return
+        try:
+            with self.db_conn.cursor() as cursor:
+                cursor.execute(query, values)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Failed to store render output: {str(e)}")
+    
+    def refresh_queue_metrics(self):
+        """Sample pending jobs by priority into the metrics registry (called from the worker loop)"""
+        if not self.db_conn:
+            return
+        
+        query = "SELECT priority, COUNT(*) AS pending FROM video_processing_jobs WHERE status = 'pending' GROUP BY priority"
+        try:
+            with self.db_conn.cursor() as cursor:
+                cursor.execute(query)
+                rows = cursor.fetchall()
+            METRICS.replace('video_queue_depth', {(('priority', str(row['priority'])),): row['pending'] for row in rows})
+        except Exception as e:
+            self.logger.warning(f"⚠️ Queue depth sampling failed: {str(e)}")
+    
+    def reap_expired_leases(self, limit: int = 100) -> List[Dict]:
+        """Return 'processing' jobs whose worker stopped heartbeating to the queue
+
+        Each reaped job counts as a failed attempt; one that has used up
+        ``max_attempts`` is marked 'failed' instead. Concurrent reapers skip
+        each other's rows. Jobs claimed before leases existed (no
+        ``lease_expires_at``) are reaped once untouched for an hour.
+        """
+        if not self.db_conn:
+            return []
+        
+        query = """
+            WITH expired AS (
+                SELECT id FROM video_processing_jobs
+                WHERE status = 'processing'
+                  AND (lease_expires_at < NOW()
+                       OR (lease_expires_at IS NULL AND updated_at < NOW() - INTERVAL '1 hour'))
+                ORDER BY lease_expires_at NULLS FIRST
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE video_processing_jobs AS j
+            SET attempts = COALESCE(j.attempts, 0) + 1,
+                status = CASE WHEN COALESCE(j.attempts, 0) + 1 >= COALESCE(j.max_attempts, 3) THEN 'failed' ELSE 'pending' END,
+                completed_at = CASE WHEN COALESCE(j.attempts, 0) + 1 >= COALESCE(j.max_attempts, 3) THEN NOW() END,
+                last_error = 'Lease expired: worker ' || COALESCE(j.worker_id, 'unknown')
+                             || ' stopped heartbeating (last ' || COALESCE(j.heartbeat_at::text, 'never') || ')',
+                progress = 0,
+                lease_expires_at = NULL,
+                updated_at = NOW()
+            FROM expired
+            WHERE j.id = expired.id
+            RETURNING j.id::text AS id, j.status, j.attempts, j.worker_id
+        """
+        try:
+            with self.db_conn.cursor() as cursor:
+                cursor.execute(query, (limit,))
+                reaped = cursor.fetchall()
+        except Exception as e:
+            self.logger.warning(f"⚠️ Lease reaper failed: {str(e)}")
+            return []
+        
+        for job in reaped:
+            outcome = 'requeued' if job['status'] == 'pending' else 'failed'
+            self.logger.warning(
+                f"💀 Job {job['id']} lost its lease (worker {job['worker_id']}), "
+                f"{outcome} after {job['attempts']} attempt(s)"
+            )
+            METRICS.inc('video_jobs_reaped_total', outcome=outcome)
+        return reaped
+    
+    def release_job(self, job_id: str):
+        """Return a claimed job to the queue without using up an attempt
+
+        For jobs that never started rendering (prefetched when the worker
+        stops) and for the one being rendered when the worker is shut down.
+        """
+        self.logger.info(f"↩️ Releasing job {job_id} back to pending")
+        self.drop_lease(job_id)
+        self.update_job_status(job_id, 'pending')
+        if self.memory_budget:
+            self.memory_budget.release(job_id)
+    
+    def update_job_status(self, job_id: str, status: str, from_status: str = 'processing', **kwargs):
+        """Update job status in database
+
+        Goes through the asynchronous ``status_writer`` unless
+        VIDEO_ASYNC_STATUS_WRITES is off; call ``flush_job_status`` before
+        reading back what was written.
+        
+        Every transition except into 'processing' only applies while the job
+        is still ``from_status`` and owned by this worker: once the reaper has
+        handed an expired lease to another worker, this one can no longer
+        complete, fail or requeue the job. Such writes are logged and dropped.
+        """
         if not self.db_conn:
             self.logger.error("❌ Database connection not available")
             return
             
-        set_clauses = ["status = %s"]
+        set_clauses = ["status = %s", "updated_at = NOW()"]
         values = [status]
+        if status == 'processing':
+            set_clauses.append("worker_id = %s, heartbeat_at = NOW(), lease_expires_at = NOW() + make_interval(secs => %s)")
+            values += [self.worker_id, float(self.config.get('lease_seconds', 60))]
+        else:
+            set_clauses.append("lease_expires_at = NULL")
+        if status == 'completed':
+            set_clauses.append("progress = 100")
+        elif status == 'pending':
+            set_clauses.append("progress = 0")
         
         for key, value in kwargs.items():
             if key == 'started_at':
@@ -508,75 +3013,178 @@ class VideoProcessor:
             elif key == 'output_thumbnail_url':
                 set_clauses.append("output_thumbnail_url = %s")
                 values.append(value)
+            elif key == 'output_preview_url' and value:
+                set_clauses.append("output_preview_url = %s")
+                values.append(value)
+            elif key == 'processing_time_ms':
+                set_clauses.append("processing_time_ms = %s")
+                values.append(int(value))
+            elif key == 'stage_timings':
+                set_clauses.append("stage_timings = %s::jsonb")
+                values.append(json.dumps(value))
         
         query = f"UPDATE video_processing_jobs SET {', '.join(set_clauses)} WHERE id = %s"
         values.append(job_id)
+        lease_guard = None
+        if status != 'processing':
+            query += " AND status = %s AND worker_id = %s"
+            values += [from_status, self.worker_id]
+            lease_guard = f"'{status}' update of job {job_id}"
         
+        if self.status_writer is not None and self.config.get('async_status_writes', True):
+            self.status_writer.submit(query, values, lease_guard)
+            return
         try:
             with self.db_conn.cursor() as cursor:
                 cursor.execute(query, values)
-                self.db_conn.commit()
+                if lease_guard and cursor.rowcount == 0:
+                    self.logger.warning(f"⚠️ Lease lost, dropped {lease_guard}")
         except Exception as e:
             self.logger.error(f"❌ Database update failed: {str(e)}")
     
+    def hold_lease(self, job_id: str):
+        """Heartbeat a claimed job's lease until ``drop_lease``"""
+        if self.status_writer is not None:
+            self.status_writer.hold(job_id)
+    
+    def drop_lease(self, job_id: str):
+        """Stop heartbeating a job that finished or went back to the queue"""
+        if self.status_writer is not None:
+            self.status_writer.drop(job_id)
+    
+    def park_lease(self, job_id: str):
+        """Keep a prepared job's lease while it waits in the prefetch hand-off queue"""
+        if self.status_writer is not None:
+            self.status_writer.park(job_id)
+    
+    def report_progress(self, job_id: str, percent: int):
+        """Publish a job's progress (0-100); coalesced by the status writer, dropped without one"""
+        if self.status_writer is not None:
+            self.status_writer.set_progress(job_id, percent)
+    
+    def touch_job(self, job_id: str):
+        """Record that a job moved forward, which keeps its lease renewed"""
+        if self.status_writer is not None:
+            self.status_writer.tick(job_id)
+    
+    def job_busy(self, job_id: str):
+        """Keep a job's lease renewed through one long call that reports no progress"""
+        return self.status_writer.busy(job_id) if self.status_writer is not None else nullcontext()
+    
+    def flush_job_status(self):
+        """Wait for queued status writes to reach the database"""
+        if self.status_writer is not None and not self.status_writer.flush():
+            self.logger.warning("⚠️ Job status writes still pending after 30s")
+    
     # Asset management methods
-    def download_assets(self, job: Dict) -> Dict:
-        """Download required assets for job"""
+    def download_assets(self, job: Dict, scratch_dir: str, asset_rows: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Download required assets for job into its ``scratch_dir``
+
+        All ``media_assets`` rows are resolved in one query (or passed in as
+        ``asset_rows``) and every object is fetched in parallel through a
+        bounded thread pool, so download time is roughly that of the slowest
+        object rather than the sum. An image used twice is fetched once.
+        """
         assets = {}
+        started = time.monotonic()
+        
+        image_ids = parse_id_array(job.get('image_ids'))
+        if asset_rows is None:
+            asset_rows = self.fetch_media_asset_rows(image_ids) if image_ids else {}
         
-        # Download product images
-        image_ids = job.get('image_ids', [])
-        if image_ids:
-            product_images = []
-            for image_id in image_ids:
-                image_path = self.download_media_asset(image_id)
-                if image_path:
-                    product_images.append(image_path)
-            assets['product_images'] = product_images
-        
-        # Download audio file
-        audio_file = job.get('audio_file')
-        if audio_file:
-            audio_path = self.download_audio_file(audio_file)
-            if audio_path:
-                assets['audio_path'] = audio_path
-        
-        # Download overlays
-        overlay_type = job.get('overlay_type', 'golden-frame')
-        if overlay_type == 'golden-frame':
-            frame_path = self.download_frame_asset('golden-frame.png')
-            if frame_path:
-                assets['frame_overlay'] = frame_path
-            
-            glitter_path = self.download_overlay_asset('glitter-rain.mp4')
-            if glitter_path:
-                assets['glitter_overlay'] = glitter_path
+        def timed(label: str, download: Callable[[], Optional[str]]) -> Optional[str]:
+            task_started = time.monotonic()
+            path = download()
+            self.touch_job(job['id'])
+            elapsed_ms = (time.monotonic() - task_started) * 1000
+            self.logger.info(f"⏱️ {label}: {elapsed_ms:.0f} ms ({'ok' if path else 'failed'})")
+            return path
+        
+        max_workers = max(1, int(self.config.get('download_concurrency', 8)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asset-download') as pool:
+            # Download product images (order of image_ids is the order of the slideshow)
+            image_futures = {}
+            for image_id in dict.fromkeys(image_ids):
+                if image_id not in asset_rows:
+                    self.logger.error(f"❌ Asset {image_id} not found in database")
+                    continue
+                image_futures[image_id] = pool.submit(
+                    timed,
+                    f"asset {image_id}",
+                    lambda image_id=image_id: self.download_media_asset(image_id, scratch_dir, asset_rows[image_id])
+                )
+            
+            # Download audio file
+            audio_file = job.get('audio_file')
+            audio_future = pool.submit(timed, f"audio {audio_file}", lambda: self.download_audio_file(audio_file, scratch_dir)) if audio_file else None
+            
+            # Download overlays
+            overlay_type = job.get('overlay_type', 'golden-frame')
+            frame_future = glitter_future = None
+            if overlay_type == 'golden-frame':
+                frame_future = pool.submit(timed, "frame golden-frame.png", lambda: self.download_frame_asset('golden-frame.png', scratch_dir))
+                # Only identified here: create_atmosphere_layer downloads it if its prepared loop is not cached
+                glitter_future = pool.submit(timed, "overlay glitter-rain.mp4", lambda: self.resolve_overlay_asset('glitter-rain.mp4'))
+            
+            if image_ids:
+                paths = {image_id: future.result() for image_id, future in image_futures.items()}
+                assets['product_images'] = [paths[image_id] for image_id in image_ids if paths.get(image_id)]
+            if audio_future and audio_future.result():
+                assets['audio_path'] = audio_future.result()
+            if frame_future and frame_future.result():
+                assets['frame_overlay'] = frame_future.result()
+            if glitter_future and glitter_future.result():
+                assets['glitter_overlay'] = glitter_future.result()
         
+        self.logger.info(f"⏱️ Downloaded job assets in {(time.monotonic() - started) * 1000:.0f} ms")
         return assets
     
-    def download_media_asset(self, asset_id: str) -> Optional[str]:
-        """Download media asset from storage"""
+    def fetch_media_asset_rows(self, asset_ids: List[str]) -> Dict[str, Dict]:
+        """Resolve ``media_assets`` metadata for many assets in a single round trip"""
+        if not self.db_conn:
+            self.logger.error("❌ Database connection not available")
+            return {}
+        
+        query = "SELECT id::text AS id, filename, content_hash FROM media_assets WHERE id = ANY(%s::uuid[])"
+        try:
+            with self.db_conn.cursor() as cursor:
+                cursor.execute(query, (list(asset_ids),))
+                return {row['id']: row for row in cursor.fetchall()}
+        except Exception as e:
+            self.logger.error(f"❌ Database query failed: {str(e)}")
+            return {}
+    
+    def download_media_asset(self, asset_id: str, scratch_dir: str, asset: Optional[Dict] = None) -> Optional[str]:
+        """Download media asset from storage, using prefetched ``media_assets`` metadata when given"""
         if not self.s3_client:
             self.logger.error("❌ Storage client not available")
             return None
             
         try:
-            # Get asset info from database
-            query = "SELECT filename, content_hash FROM media_assets WHERE id = %s"
-            with self.db_conn.cursor() as cursor:
-                cursor.execute(query, (asset_id,))
-                asset = cursor.fetchone()
+            if asset is None:
+                # Get asset info from database
+                asset = self.fetch_media_asset_rows([asset_id]).get(asset_id)
             
             if not asset:
                 self.logger.error(f"❌ Asset {asset_id} not found in database")
                 return None
             
-            # Download from S3
-            local_path = f"/tmp/asset_{asset_id}.jpg"
-            self.s3_client.download_file(
-                f"media/{asset['content_hash'][:2]}/{asset['content_hash']}/{asset['filename']}",
-                local_path
-            )
+            remote_path = f"media/{asset['content_hash'][:2]}/{asset['content_hash']}/{asset['filename']}"
+            ext = os.path.splitext(asset['filename'])[1].lower()
+            local_path = os.path.join(scratch_dir, f"asset_{asset_id}{ext or '.jpg'}")
+            
+            if self.asset_cache:
+                hit = self.asset_cache.fetch_into(
+                    asset['content_hash'],
+                    ext,
+                    lambda tmp_path: self.download_from_storage(remote_path, tmp_path),
+                    local_path
+                )
+                self.logger.info(f"{'⚡ Cache hit' if hit else '📥 Cache miss'} for asset {asset_id} ({asset['content_hash'][:12]})")
+                record_cache('asset', hit)
+            else:
+                # Download from S3
+                self.download_from_storage(remote_path, local_path)
             
             self.logger.info(f"✅ Downloaded asset {asset_id} to {local_path}")
             return local_path
@@ -585,49 +3193,53 @@ class VideoProcessor:
             self.logger.error(f"❌ Failed to download asset {asset_id}: {str(e)}")
             return None
     
-    def download_audio_file(self, audio_file: str) -> Optional[str]:
+    def download_from_storage(self, remote_path: str, local_path: str):
+        """Download one object from the configured bucket"""
+        self.s3_client.download_file(self.config.get('s3_bucket'), remote_path, local_path, Config=self.transfer_config)
+        METRICS.inc('video_s3_bytes_total', os.path.getsize(local_path), direction='download')
+    
+    def download_audio_file(self, audio_file: str, scratch_dir: str) -> Optional[str]:
         """Download audio file from storage"""
         if not self.s3_client:
             self.logger.error("❌ Storage client not available")
             return None
             
         try:
-            local_path = f"/tmp/audio_{int(time.time())}.mp3"
-            self.s3_client.download_file(f"audio/{audio_file}", local_path)
+            local_path = os.path.join(scratch_dir, f"audio{os.path.splitext(audio_file)[1].lower() or '.mp3'}")
+            self.download_from_storage(f"audio/{audio_file}", local_path)
             self.logger.info(f"✅ Downloaded audio {audio_file} to {local_path}")
             return local_path
         except Exception as e:
             self.logger.error(f"❌ Failed to download audio {audio_file}: {str(e)}")
             return None
     
-    def download_frame_asset(self, frame_name: str) -> Optional[str]:
+    def download_frame_asset(self, frame_name: str, scratch_dir: str) -> Optional[str]:
         """Download frame asset from storage"""
         if not self.s3_client:
             self.logger.error("❌ Storage client not available")
             return None
             
         try:
-            local_path = f"/tmp/frame_{int(time.time())}.png"
-            self.s3_client.download_file(f"frames/{frame_name}", local_path)
+            local_path = os.path.join(scratch_dir, f"frame_{os.path.basename(frame_name)}")
+            self.download_from_storage(f"frames/{frame_name}", local_path)
             self.logger.info(f"✅ Downloaded frame {frame_name} to {local_path}")
             return local_path
         except Exception as e:
             self.logger.error(f"❌ Failed to download frame {frame_name}: {str(e)}")
             return None
     
-    def download_overlay_asset(self, overlay_name: str) -> Optional[str]:
-        """Download overlay asset from storage"""
+    def resolve_overlay_asset(self, overlay_name: str) -> Optional[Dict]:
+        """Identify an overlay in storage by its ETag: ``{'remote_path', 'etag'}``"""
         if not self.s3_client:
             self.logger.error("❌ Storage client not available")
             return None
             
         try:
-            local_path = f"/tmp/overlay_{int(time.time())}.mp4"
-            self.s3_client.download_file(f"overlays/{overlay_name}", local_path)
-            self.logger.info(f"✅ Downloaded overlay {overlay_name} to {local_path}")
-            return local_path
+            remote_path = f"overlays/{overlay_name}"
+            head = self.s3_client.head_object(Bucket=self.config.get('s3_bucket'), Key=remote_path)
+            return {'remote_path': remote_path, 'etag': head['ETag'].strip('"')}
         except Exception as e:
-            self.logger.error(f"❌ Failed to download overlay {overlay_name}: {str(e)}")
+            self.logger.error(f"❌ Failed to resolve overlay {overlay_name}: {str(e)}")
             return None
     
     def get_default_asset(self, asset_name: str) -> Optional[str]:
@@ -642,41 +3254,208 @@ class VideoProcessor:
             self.logger.warning(f"⚠️ Default asset not found: {asset_path}")
             return None
     
-    def upload_to_storage(self, local_path: str, remote_path: str, tenant_id: str) -> str:
-        """Upload file to storage and return URL"""
+    def upload_to_storage(self, local_path: str, remote_path: str, tenant_id: str, job_id: Optional[str] = None) -> str:
+        """Upload file to storage and return URL
+
+        Raises on failure, so the job fails (and is retried) instead of
+        completing, and being stored for render dedup, without its output.
+        Transferred chunks count as progress of ``job_id``.
+        """
         if not self.s3_client:
-            self.logger.error("❌ Storage client not available")
-            return ""
+            raise RuntimeError("Storage client not available")
             
         try:
-            self.s3_client.upload_file(local_path, remote_path)
-            # Generate URL (this would depend on your storage provider)
-            url = f"https://your-storage-domain.com/{remote_path}"
+            content_type = mimetypes.guess_type(remote_path)[0]
+            self.s3_client.upload_file(
+                local_path,
+                self.config.get('s3_bucket'),
+                remote_path,
+                ExtraArgs={'ContentType': content_type} if content_type else None,
+                Config=self.transfer_config,
+                Callback=(lambda _: self.touch_job(job_id)) if job_id else None
+            )
+            METRICS.inc('video_s3_bytes_total', os.path.getsize(local_path), direction='upload')
+            url = self.storage_url(remote_path)
             self.logger.info(f"✅ Uploaded {local_path} to {remote_path}")
             return url
         except Exception as e:
             self.logger.error(f"❌ Failed to upload {local_path}: {str(e)}")
-            return ""
+            raise
     
-    def cleanup_temp_files(self):
-        """Clean up temporary files"""
+    def storage_url(self, remote_path: str) -> str:
+        """Public URL of an uploaded object"""
+        # Generate URL (this would depend on your storage provider)
+        return f"https://your-storage-domain.com/{remote_path}"
+    
+    def start_streaming_upload(self, remote_path: str) -> Optional[StreamingMultipartUpload]:
+        """Open a multipart upload that the encoder can feed while it is still running"""
+        if not self.s3_client:
+            return None
         try:
-            temp_dir = "/tmp"
-            for filename in os.listdir(temp_dir):
-                if filename.startswith(('video_', 'thumb_', 'asset_', 'audio_', 'frame_', 'overlay_')):
-                    file_path = os.path.join(temp_dir, filename)
-                    try:
-                        os.remove(file_path)
-                        self.logger.debug(f"🧹 Cleaned up temp file: {file_path}")
-                    except Exception as e:
-                        self.logger.warning(f"⚠️ Failed to remove temp file {file_path}: {str(e)}")
+            return StreamingMultipartUpload(
+                self.s3_client,
+                self.config.get('s3_bucket'),
+                remote_path,
+                int(self.config.get('s3_part_size_mb', 16)) * 1024 * 1024,
+                int(self.config.get('s3_transfer_concurrency', 8)),
+                mimetypes.guess_type(remote_path)[0]
+            )
         except Exception as e:
-            self.logger.error(f"❌ Cleanup failed: {str(e)}")
+            self.logger.warning(f"⚠️ Streaming upload unavailable, uploading after encode: {str(e)}")
+            return None
 
-def main():
-    """Main worker loop"""
-    # Initialize processor with configuration
-    config = {
+# How often a worker whose memory budget is full looks for room again
+MEMORY_RETRY_INTERVAL = 1.0
+
+class MemoryBudget:
+    """Memory budget for the jobs of every worker process on a host
+
+    Jobs reserve ``estimate_job_memory_mb`` when they are claimed and give it
+    back when they finish or are released. Each worker slot keeps its total in
+    shared memory created by the supervisor before it forks, and the slot is
+    zeroed whenever its worker is (re)started, so a crashed worker never leaks
+    budget. A job is always admitted when no job holds a reservation: one
+    whose estimate alone exceeds the budget still runs, just alone.
+    """
+    
+    def __init__(self, budget_mb: float, slots: int = 1, ctx=None):
+        ctx = ctx or multiprocessing.get_context('fork')
+        self.budget_mb = budget_mb
+        self.slot_reserved = ctx.Array('d', max(1, slots))
+        self.slot = 0
+        # This process's reservations by job id (the worker and prefetch threads share them)
+        self.reservations: Dict[str, float] = {}
+        self.lock = threading.Lock()
+    
+    def bind(self, slot: int):
+        """Attach a freshly started worker to its (zeroed) slot"""
+        self.slot = slot
+        with self.slot_reserved.get_lock():
+            self.slot_reserved[slot] = 0.0
+    
+    def reserved_mb(self) -> float:
+        return sum(self.slot_reserved[:])
+    
+    def claimable_modes(self, config: Dict) -> Optional[List[str]]:
+        """Quality modes whose worst-case job fits the room left: None when all do"""
+        reserved = self.reserved_mb()
+        if reserved <= 0:
+            return None
+        room = self.budget_mb - reserved
+        modes = [mode for mode in RENDER_PROFILES if estimate_job_memory_mb(config, mode) <= room]
+        return None if 'normal' in modes else modes
+    
+    def reserve(self, job: Dict, config: Dict) -> bool:
+        """Reserve memory for a claimed job; False if it no longer fits"""
+        duration = float(job['duration_target']) if job.get('duration_target') else None
+        needed = estimate_job_memory_mb(config, job.get('quality_mode'), duration)
+        with self.lock, self.slot_reserved.get_lock():
+            reserved = self.reserved_mb()
+            if reserved > 0 and reserved + needed > self.budget_mb:
+                return False
+            self.reservations[job['id']] = needed
+            self.slot_reserved[self.slot] += needed
+        METRICS.set('video_memory_reserved_mb', sum(self.reservations.values()))
+        return True
+    
+    def release(self, job_id: str):
+        with self.lock, self.slot_reserved.get_lock():
+            needed = self.reservations.pop(job_id, None)
+            if needed is not None:
+                self.slot_reserved[self.slot] = max(0.0, self.slot_reserved[self.slot] - needed)
+        METRICS.set('video_memory_reserved_mb', sum(self.reservations.values()))
+
+class JobPrefetcher:
+    """Claims and prepares upcoming jobs on a background thread
+
+    While the worker encodes job N, the prefetch thread claims job N+1,
+    downloads its assets and runs beat detection, so the next render starts
+    with all of its I/O already done. At most ``depth`` prepared jobs wait
+    in the hand-off queue; a slot is freed when the worker takes a job.
+    Prefetched jobs are claimed, so idle workers elsewhere cannot take them
+    meanwhile; VIDEO_PREFETCH_DEPTH therefore defaults to 0. The thread owns a separate ``VideoProcessor`` (and therefore its own
+    database connection and storage client).
+    """
+    
+    def __init__(
+        self,
+        config: Dict,
+        depth: int,
+        status_writer: Optional[JobStatusWriter] = None,
+        memory_budget: Optional[MemoryBudget] = None
+    ):
+        self.config = config
+        self.depth = depth
+        self.status_writer = status_writer
+        self.memory_budget = memory_budget
+        self.ready: queue.Queue = queue.Queue()
+        self.slots = threading.Semaphore(depth)
+        self.stop_event = threading.Event()
+        self.processor: Optional[VideoProcessor] = None
+        self.thread = threading.Thread(target=self._run, name='job-prefetch', daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def _run(self):
+        # Leases of prefetched jobs are renewed by the worker's status writer; releases are
+        # rare and off the render path, so they are written synchronously
+        self.processor = VideoProcessor(dict(self.config, async_status_writes=False), self.status_writer, self.memory_budget)
+        idle_wait = self.config.get('poll_interval', 5)
+        if self.config.get('dispatch_mode') == 'listen' and self.processor.setup_listener():
+            idle_wait = self.config.get('backstop_poll_interval', 30)
+        
+        while not self.stop_event.is_set():
+            if not self.slots.acquire(timeout=1):
+                continue
+            try:
+                if not self.processor.db_conn:
+                    self.processor.setup_connections()
+                job = self.processor.claim_next_job() if self.processor.db_conn else None
+            except Exception as e:
+                self.processor.logger.error(f"❌ Prefetch claim failed: {str(e)}")
+                job = None
+            
+            if not job:
+                self.slots.release()
+                # Memory frees up when a job finishes, which sends no notification
+                self.processor.wait_for_work(MEMORY_RETRY_INTERVAL if self.processor.memory_blocked else idle_wait)
+                continue
+            
+            self.processor.logger.info(f"⏩ Prefetching job {job['id']}")
+            try:
+                prepared = self.processor.prepare_job(job)
+            except Exception as e:
+                self.processor.logger.error(f"❌ Prefetch failed for job {job['id']}: {str(e)}", exc_info=True)
+                prepared = {'error': str(e)}
+            self.processor.park_lease(job['id'])
+            self.ready.put((job, prepared))
+    
+    def next_job(self, timeout: float) -> Optional[Tuple[Dict, Dict]]:
+        """Take the next prepared job, or None if nothing is ready within ``timeout``"""
+        try:
+            item = self.ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.slots.release()
+        return item
+    
+    def stop(self):
+        """Stop prefetching and hand every unstarted job back to the queue"""
+        self.stop_event.set()
+        self.thread.join(timeout=60)
+        while True:
+            try:
+                job, prepared = self.ready.get_nowait()
+            except queue.Empty:
+                break
+            if self.processor:
+                self.processor.release_job(job['id'])
+                self.processor.remove_scratch_dir(prepared.get('scratch_dir'))
+
+def build_config() -> Dict:
+    """Build worker configuration from environment variables"""
+    return {
         'db_host': os.getenv('DB_HOST', 'localhost'),
         'db_name': os.getenv('DB_NAME', 'sass_store'),
         'db_user': os.getenv('DB_USER', 'postgres'),
@@ -684,58 +3463,240 @@ def main():
         'db_port': os.getenv('DB_PORT', '5432'),
         's3_endpoint': os.getenv('S3_ENDPOINT'),
         's3_access_key': os.getenv('S3_ACCESS_KEY'),
-        's3_secret_key': os.getenv('S3_SECRET_KEY')
+        's3_secret_key': os.getenv('S3_SECRET_KEY'),
+        's3_bucket': os.getenv('S3_BUCKET', 'sass-store'),
+        'asset_cache_dir': os.getenv('VIDEO_ASSET_CACHE_DIR', '/var/tmp/video-asset-cache'),
+        'asset_cache_max_mb': int(os.getenv('VIDEO_ASSET_CACHE_MAX_MB', '2048')),
+        'scratch_dir': os.getenv('VIDEO_SCRATCH_DIR', ''),
+        'download_concurrency': int(os.getenv('VIDEO_DOWNLOAD_CONCURRENCY', '8')),
+        'prefetch_depth': int(os.getenv('VIDEO_PREFETCH_DEPTH', '0')),
+        'rss_budget_mb': float(os.getenv('VIDEO_RSS_BUDGET_MB', '0')),
+        'beat_analysis_mode': os.getenv('VIDEO_BEAT_ANALYSIS', 'full'),
+        'static_layer_cache_entries': int(os.getenv('VIDEO_STATIC_LAYER_CACHE_ENTRIES', '8')),
+        'render_backend': os.getenv('VIDEO_RENDER_BACKEND', 'ffmpeg'),
+        'preview_mode': os.getenv('VIDEO_PREVIEW', 'none'),
+        'render_dedup': os.getenv('VIDEO_RENDER_DEDUP', 'true').lower() != 'false',
+        'segment_workers': int(os.getenv('VIDEO_SEGMENT_WORKERS', '0')),
+        'segment_min_duration': float(os.getenv('VIDEO_SEGMENT_MIN_SECONDS', '20')),
+        's3_max_pool_connections': int(os.getenv('S3_MAX_POOL_CONNECTIONS', '32')),
+        's3_part_size_mb': int(os.getenv('S3_PART_SIZE_MB', '16')),
+        's3_transfer_concurrency': int(os.getenv('S3_TRANSFER_CONCURRENCY', '8')),
+        's3_stream_upload': os.getenv('VIDEO_STREAM_UPLOAD', 'false').lower() == 'true',
+        'metrics_port': int(os.getenv('VIDEO_METRICS_PORT', '0')),
+        'metrics_queue_interval': float(os.getenv('VIDEO_METRICS_QUEUE_INTERVAL', '15')),
+        'dispatch_mode': os.getenv('VIDEO_DISPATCH_MODE', 'listen'),
+        'notify_channel': os.getenv('VIDEO_NOTIFY_CHANNEL', 'video_processing_jobs'),
+        'async_status_writes': os.getenv('VIDEO_ASYNC_STATUS_WRITES', 'true').lower() == 'true',
+        'status_flush_interval': float(os.getenv('VIDEO_STATUS_FLUSH_INTERVAL', '2')),
+        'lease_seconds': float(os.getenv('VIDEO_LEASE_SECONDS', '60')),
+        'scheduler': os.getenv('VIDEO_SCHEDULER', 'fair'),
+        'tenant_max_in_flight': int(os.getenv('VIDEO_TENANT_MAX_IN_FLIGHT', '0')),
+        'fair_credit_seconds': float(os.getenv('VIDEO_FAIR_CREDIT_SECONDS', '120')),
+        'priority_aging_seconds': float(os.getenv('VIDEO_PRIORITY_AGING_SECONDS', '600')),
+        'heartbeat_interval': float(os.getenv('VIDEO_HEARTBEAT_INTERVAL', '15')),
+        'reaper_interval': float(os.getenv('VIDEO_REAPER_INTERVAL', '30')),
+        'poll_interval': float(os.getenv('VIDEO_POLL_INTERVAL', '5')),
+        'backstop_poll_interval': float(os.getenv('VIDEO_BACKSTOP_POLL_INTERVAL', '30'))
     }
+
+def run_worker(config: Dict, memory_budget: Optional[MemoryBudget] = None):
+    """Worker loop: claim and process jobs until interrupted
+
+    ``memory_budget`` is the supervisor's host-wide budget; a single worker
+    creates its own when VIDEO_RSS_BUDGET_MB is set.
+    """
+    if memory_budget is None and config.get('rss_budget_mb', 0) > 0:
+        memory_budget = MemoryBudget(config['rss_budget_mb'])
+    if memory_budget:
+        memory_budget.bind(config.get('worker_index', 0))
+    processor = VideoProcessor(config, memory_budget=memory_budget)
+    processor.logger.info(f"🚀 Starting video processor worker (pid {os.getpid()})...")
+    if memory_budget:
+        processor.logger.info(f"🧮 Admitting jobs within a {memory_budget.budget_mb:.0f} MB memory budget")
     
-    processor = VideoProcessor(config)
-    processor.logger.info("🚀 Starting video processor worker...")
-    
-    while True:
+    # Optional Prometheus endpoint; supervised workers each take base port + their slot
+    metrics_enabled = config.get('metrics_port', 0) > 0
+    if metrics_enabled:
+        port = config['metrics_port'] + config.get('worker_index', 0)
         try:
-            # Get next pending job
-            if not processor.db_conn:
-                processor.logger.error("❌ No database connection, waiting...")
-                time.sleep(10)
-                # Try to reconnect
-                processor.setup_connections()
-                continue
+            start_metrics_server(port)
+            processor.logger.info(f"📈 Metrics at http://0.0.0.0:{port}/metrics")
+        except OSError as e:
+            processor.logger.error(f"❌ Metrics endpoint disabled, port {port} unavailable: {str(e)}")
+            metrics_enabled = False
+    queue_sampled_at = 0.0
+    reaped_at = 0.0
+    
+    # Claim and prepare upcoming jobs in the background while this one encodes
+    prefetcher = None
+    if config.get('prefetch_depth', 0) > 0:
+        prefetcher = JobPrefetcher(config, config['prefetch_depth'], processor.status_writer, memory_budget)
+        prefetcher.start()
+        processor.logger.info(f"⏩ Prefetching up to {config['prefetch_depth']} job(s) ahead")
+    
+    # In 'listen' mode workers sleep on LISTEN/NOTIFY and only poll as a slow backstop
+    idle_wait = config.get('poll_interval', 5)
+    if not prefetcher and config.get('dispatch_mode') == 'listen' and processor.setup_listener():
+        idle_wait = config.get('backstop_poll_interval', 30)
+    
+    # Set while process_job runs: a shutdown then requeues the job instead of leaving it to the reaper
+    current_job_id = None
+    try:
+        while True:
+            try:
+                # Get next pending job
+                if not processor.db_conn:
+                    processor.logger.error("❌ No database connection, waiting...")
+                    time.sleep(10)
+                    # Try to reconnect
+                    processor.setup_connections()
+                    continue
                 
-            query = """
-                SELECT id FROM video_processing_jobs 
-                WHERE status = 'pending' 
-                ORDER BY priority DESC, created_at ASC 
-                LIMIT 1
-                FOR UPDATE SKIP LOCKED
-            """
-            
-            with processor.db_conn.cursor() as cursor:
-                cursor.execute(query)
-                job = cursor.fetchone()
-            
-            if job:
-                success = processor.process_job(job['id'])
-                if not success:
-                    # Check if should retry
-                    job_details = processor.get_job(job['id'])
-                    if job_details and job_details['attempts'] < job_details['max_attempts']:
-                        processor.logger.info(f"🔄 Retrying job {job['id']} (attempt {job_details['attempts'] + 1})")
-                        # Reset to pending for retry
-                        processor.update_job_status(job['id'], 'pending')
-                    else:
-                        # Mark as failed after max attempts
-                        processor.logger.error(f"❌ Job {job['id']} failed after max attempts")
-                        processor.update_job_status(job['id'], 'failed')
-            else:
-                # No jobs available, wait
-                # processor.logger.debug("💤 No pending jobs, waiting...")
-                time.sleep(5)
+                if metrics_enabled and time.monotonic() - queue_sampled_at >= config.get('metrics_queue_interval', 15):
+                    processor.refresh_queue_metrics()
+                    queue_sampled_at = time.monotonic()
                 
-        except KeyboardInterrupt:
-            processor.logger.info("👋 Worker stopped by user")
-            break
-        except Exception as e:
-            processor.logger.error(f"❌ Worker error: {str(e)}")
-            time.sleep(10)
+                # Every worker reaps: jobs of a crashed worker come back as long as any worker is alive
+                if time.monotonic() - reaped_at >= config.get('reaper_interval', 30):
+                    processor.reap_expired_leases()
+                    reaped_at = time.monotonic()
+                
+                prepared = None
+                if prefetcher:
+                    item = prefetcher.next_job(timeout=1)
+                    job, prepared = item if item else (None, None)
+                else:
+                    job = processor.claim_next_job()
+                
+                if job:
+                    METRICS.inc('video_jobs_in_flight')
+                    current_job_id = job['id']
+                    try:
+                        success = processor.process_job(job['id'], job=job, prepared=prepared)
+                    finally:
+                        METRICS.inc('video_jobs_in_flight', -1)
+                    current_job_id = None
+                    if not success:
+                        # Check if should retry (the retry decision reads what process_job wrote)
+                        processor.flush_job_status()
+                        job_details = processor.get_job(job['id'])
+                        if job_details and job_details['attempts'] < job_details['max_attempts']:
+                            processor.logger.info(f"🔄 Retrying job {job['id']} (attempt {job_details['attempts'] + 1})")
+                            METRICS.inc('video_job_retries_total')
+                            # Reset to pending for retry
+                            processor.update_job_status(job['id'], 'pending', from_status='failed')
+                        else:
+                            # Mark as failed after max attempts
+                            processor.logger.error(f"❌ Job {job['id']} failed after max attempts")
+                            processor.update_job_status(job['id'], 'failed', from_status='failed')
+                elif not prefetcher:
+                    # No jobs available, wait for a notification or the next poll
+                    # processor.logger.debug("💤 No pending jobs, waiting...")
+                    processor.wait_for_work(MEMORY_RETRY_INTERVAL if processor.memory_blocked else idle_wait)
+                    
+            except KeyboardInterrupt:
+                processor.logger.info("👋 Worker stopped by user")
+                break
+            except Exception as e:
+                processor.logger.error(f"❌ Worker error: {str(e)}")
+                time.sleep(10)
+    finally:
+        if current_job_id:
+            processor.release_job(current_job_id)
+        if prefetcher:
+            prefetcher.stop()
+        processor.close()
+
+def _worker_process_entry(config: Dict, slot: int = 0, memory_budget: Optional[MemoryBudget] = None):
+    """Entry point for forked worker processes"""
+    # Let the supervisor decide when children stop; SIGTERM ends the loop like Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    run_worker(dict(config, worker_index=slot), memory_budget)
+
+def run_supervisor(config: Dict, num_workers: int):
+    """Fork ``num_workers`` worker processes and respawn any that exit unexpectedly
+
+    Each child opens its own database and storage connections after the fork;
+    nothing connection-related is created in the supervisor itself. With
+    VIDEO_RSS_BUDGET_MB the children share one ``MemoryBudget``, so the
+    number of jobs in flight follows their estimated size rather than
+    ``num_workers`` alone.
+    """
+    # Configure only the supervisor logger so forked children still run their own basicConfig
+    logger = logging.getLogger('VideoSupervisor')
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    ctx = multiprocessing.get_context('fork')
+    workers: Dict[int, multiprocessing.Process] = {}
+    stopping = False
+    memory_budget = None
+    if config.get('rss_budget_mb', 0) > 0:
+        memory_budget = MemoryBudget(config['rss_budget_mb'], num_workers, ctx)
+    
+    def spawn(slot: int):
+        process = ctx.Process(
+            target=_worker_process_entry,
+            args=(config, slot, memory_budget),
+            name=f"video-worker-{slot}",
+            daemon=False
+        )
+        process.start()
+        workers[slot] = process
+        logger.info(f"🧵 Started worker {slot} (pid {process.pid})")
+    
+    def handle_term(signum, frame):
+        nonlocal stopping
+        stopping = True
+    
+    signal.signal(signal.SIGTERM, handle_term)
+    logger.info(f"🚀 Starting supervisor with {num_workers} workers")
+    for slot in range(num_workers):
+        spawn(slot)
+    
+    try:
+        while not stopping:
+            time.sleep(1)
+            for slot, process in list(workers.items()):
+                if not process.is_alive() and not stopping:
+                    logger.warning(f"⚠️ Worker {slot} (pid {process.pid}) exited with code {process.exitcode}, restarting")
+                    time.sleep(1)
+                    spawn(slot)
+    except KeyboardInterrupt:
+        logger.info("👋 Supervisor stopped by user")
+    finally:
+        for process in workers.values():
+            if process.is_alive():
+                process.terminate()
+        for process in workers.values():
+            process.join(timeout=30)
+        logger.info("👋 All workers stopped")
+
+def main():
+    """Parse arguments and run a single worker or a multi-process supervisor"""
+    parser = argparse.ArgumentParser(description='Video processing worker')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=int(os.getenv('VIDEO_WORKERS', '1')),
+        help='Number of worker processes to fork (default: 1, env VIDEO_WORKERS)'
+    )
+    parser.add_argument(
+        '--dispatch',
+        choices=['listen', 'poll'],
+        help='Wake on LISTEN/NOTIFY with a backstop poll, or poll only (env VIDEO_DISPATCH_MODE)'
+    )
+    args = parser.parse_args()
+    
+    config = build_config()
+    if args.dispatch:
+        config['dispatch_mode'] = args.dispatch
+    if args.workers > 1:
+        run_supervisor(config, args.workers)
+    else:
+        run_worker(config)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+"""
+Video Processing Worker Benchmarks
+Measures worker hot paths against a real or local stand-in environment
+"""
+
+import sys
+import os
+import json
+import random
+import time
+import argparse
+import threading
+import importlib.util
+import tracemalloc
+import hashlib
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import wave
+import multiprocessing
+import queue
+from typing import Dict, List, Optional
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'video-processor-worker.py')
+
+def load_worker():
+    """Import video-processor-worker.py as a module (its filename is not importable)"""
+    spec = importlib.util.spec_from_file_location('video_processor_worker', WORKER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so process pools (segment rendering) can pickle the worker's functions
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values``"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(values: List[float]) -> Dict:
+    """Latency summary in milliseconds"""
+    return {
+        'samples': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p95_ms': round(percentile(values, 95) * 1000, 2),
+        'max_ms': round(max(values) * 1000, 2) if values else 0.0
+    }
+
+# Dispatch latency benchmark
+BENCH_TABLE = 'video_dispatch_bench'
+
+def _setup_dispatch_table(conn):
+    """Create a scratch queue wired to the same notify trigger as video_processing_jobs"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            DROP TABLE IF EXISTS {BENCH_TABLE};
+            CREATE TABLE {BENCH_TABLE} (
+                id SERIAL PRIMARY KEY,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                created_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+                started_at TIMESTAMPTZ
+            );
+            CREATE TRIGGER {BENCH_TABLE}_notify
+              AFTER INSERT ON {BENCH_TABLE}
+              FOR EACH ROW
+              EXECUTE FUNCTION notify_video_processing_job('{BENCH_TABLE}');
+        """)
+    conn.commit()
+
+def _claim_bench_rows(conn) -> List[float]:
+    """Claim every pending scratch row and return enqueue-to-start latencies in seconds"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {BENCH_TABLE}
+            SET status = 'processing', started_at = clock_timestamp()
+            WHERE status = 'pending'
+            RETURNING EXTRACT(EPOCH FROM started_at - created_at) AS latency
+        """)
+        rows = cursor.fetchall()
+    conn.commit()
+    return [float(row['latency']) for row in rows]
+
+def run_dispatch_benchmark(worker, mode: str, jobs: int, max_gap: float) -> Dict:
+    """Enqueue ``jobs`` rows at random intervals and measure how fast a worker starts them"""
+    config = worker.build_config()
+    config['notify_channel'] = BENCH_TABLE
+    consumer = worker.VideoProcessor(config)
+    producer = consumer.connect_db()
+    _setup_dispatch_table(producer)
+
+    idle_wait = config['poll_interval']
+    if mode == 'listen':
+        consumer.setup_listener()
+        idle_wait = config['backstop_poll_interval']
+
+    def produce():
+        for _ in range(jobs):
+            time.sleep(random.uniform(0.05, max_gap))
+            with producer.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {BENCH_TABLE} DEFAULT VALUES")
+            producer.commit()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    latencies: List[float] = []
+    try:
+        while len(latencies) < jobs:
+            claimed = _claim_bench_rows(consumer.db_conn)
+            if claimed:
+                latencies.extend(claimed)
+            else:
+                consumer.wait_for_work(idle_wait)
+    finally:
+        thread.join()
+        with producer.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        producer.commit()
+        producer.close()
+
+    return {'mode': mode, 'poll_interval_s': idle_wait, **summarize(latencies)}
+
+# Beat detection accuracy/cost benchmark
+def beat_f_measure(reference: List[float], estimated: List[float], tolerance: float = 0.07) -> Dict:
+    """Precision/recall/F-measure of estimated beats within +/- ``tolerance`` seconds (greedy matching)"""
+    matched = 0
+    used = set()
+    for beat in reference:
+        best = None
+        for index, candidate in enumerate(estimated):
+            if index in used or abs(candidate - beat) > tolerance:
+                continue
+            if best is None or abs(candidate - beat) < abs(estimated[best] - beat):
+                best = index
+        if best is not None:
+            used.add(best)
+            matched += 1
+    precision = matched / len(estimated) if estimated else 0.0
+    recall = matched / len(reference) if reference else 0.0
+    f_measure = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': round(precision, 4), 'recall': round(recall, 4), 'f_measure': round(f_measure, 4)}
+
+def _measure(fn):
+    """Run ``fn`` and return (result, seconds, peak traced MB)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+def run_beats_benchmark(worker, audio_path: str, duration: float) -> Dict:
+    """Compare the full librosa path with streaming detection on the same span of a track"""
+    librosa = worker.librosa
+    np = worker.np
+    # Warm up numba-compiled librosa internals so JIT time is not billed to either path
+    librosa.beat.beat_track(y=np.random.default_rng(0).standard_normal(22050 * 5).astype(np.float32), sr=22050)
+
+    def full():
+        y, sr = librosa.load(audio_path, duration=duration or None)
+        tempo, beats = librosa.beat.beat_track(y=y, sr=sr, trim=False)
+        return librosa.frames_to_time(beats, sr=sr).tolist()
+
+    reference, full_seconds, full_peak = _measure(full)
+    (_, tempo, estimated), fast_seconds, fast_peak = _measure(
+        lambda: worker.detect_beats_streaming(audio_path, duration or None)
+    )
+    return {
+        'audio': audio_path,
+        'duration_s': duration,
+        'full': {'seconds': round(full_seconds, 3), 'peak_mb': round(full_peak, 1), 'beats': len(reference)},
+        'streaming': {'seconds': round(fast_seconds, 3), 'peak_mb': round(fast_peak, 1), 'beats': len(estimated), 'tempo': round(tempo, 1)},
+        'accuracy': beat_f_measure(reference, estimated)
+    }
+
+# End-to-end render benchmark
+BENCH_BUCKET = 'bench'
+BENCH_TENANT = '00000000-0000-0000-0000-00000000bead'
+FIXTURE_VERSION = 'fixtures-v1'  # Bump when generated fixtures change
+
+def _write_wav(path: str, samples, sample_rate: int):
+    """Write float samples in [-1, 1], shaped (n, 2), as 16-bit PCM"""
+    np = _numpy()
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(pcm.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+def _numpy():
+    import numpy
+    return numpy
+
+def generate_fixtures(root: str, max_images: int, durations: List[float], seed: int) -> Dict:
+    """Create deterministic product images, soundtracks and overlays under ``root``
+
+    Returns the fixture manifest. Files that already exist for the same
+    version and seed are reused, so repeated runs compare like with like.
+    """
+    np = _numpy()
+    from PIL import Image, ImageDraw, ImageFilter
+    worker = load_worker()
+
+    manifest_path = os.path.join(root, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        have = {float(d) for d in manifest['audio']}
+        if manifest.get('version') == FIXTURE_VERSION and manifest.get('seed') == seed \
+                and len(manifest['images']) >= max_images and have.issuperset(durations):
+            return manifest
+    
+    os.makedirs(root, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    manifest = {'version': FIXTURE_VERSION, 'seed': seed, 'images': [], 'audio': {}}
+    
+    # Product shots: gradient backdrop, a few soft shapes and sensor-like noise (so x264 has real work)
+    for index in range(max_images):
+        width, height = 1200, 1600
+        base = np.linspace(rng.integers(20, 120, 3), rng.integers(120, 250, 3), height).astype(np.uint8)
+        image = Image.fromarray(np.repeat(base[:, None, :], width, axis=1))
+        draw = ImageDraw.Draw(image)
+        for _ in range(6):
+            x, y = rng.integers(0, width - 200), rng.integers(0, height - 200)
+            size = int(rng.integers(120, 600))
+            draw.ellipse([x, y, x + size, y + size], fill=tuple(int(c) for c in rng.integers(0, 255, 3)))
+        image = image.filter(ImageFilter.GaussianBlur(3))
+        noisy = np.asarray(image).astype(np.int16) + rng.integers(-12, 12, (height, width, 3))
+        path = os.path.join(root, f"product_{index}.jpg")
+        Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8)).save(path, quality=90)
+        manifest['images'].append(path)
+    
+    # Soundtracks: 44.1 kHz stereo, kick on every beat at 120 BPM over a pad
+    sample_rate = 44100
+    for duration in sorted(set(durations)):
+        t = np.arange(int(duration * sample_rate)) / sample_rate
+        pad = 0.15 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 277 * t)
+        since_beat = t % 0.5
+        kick = 0.8 * np.exp(-since_beat * 30) * np.sin(2 * np.pi * 60 * since_beat)
+        mono = pad + kick
+        path = os.path.join(root, f"track_{duration:g}s.wav")
+        _write_wav(path, np.stack([mono, mono], axis=1), sample_rate)
+        manifest['audio'][f"{duration:g}"] = path
+    
+    # Golden frame: transparent PNG with a gold border
+    frame = Image.new('RGBA', worker.OUTPUT_SIZE, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(frame)
+    draw.rectangle([30, 30, worker.OUTPUT_SIZE[0] - 30, worker.OUTPUT_SIZE[1] - 30], outline=worker.GOLD_COLOR + (255,), width=24)
+    manifest['frame'] = os.path.join(root, 'golden-frame.png')
+    frame.save(manifest['frame'])
+    
+    # Atmosphere: 3 s of falling sparkles, encoded like the production overlay
+    manifest['overlay'] = os.path.join(root, 'glitter-rain.mp4')
+    width, height, fps = 540, 960, 30
+    sparkles = rng.integers(0, [width, height], (400, 2))
+    speeds = rng.integers(4, 16, 400)
+    command = [
+        worker.FFMPEG_BINARY, '-v', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f"{width}x{height}", '-r', str(fps), '-i', 'pipe:0',
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', manifest['overlay']
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    for index in range(3 * fps):
+        frame_rgb = np.zeros((height, width, 3), dtype=np.uint8)
+        ys = (sparkles[:, 1] + speeds * index) % height
+        frame_rgb[ys, sparkles[:, 0]] = (255, 230, 160)
+        process.stdin.write(frame_rgb.tobytes())
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError('ffmpeg failed to encode the atmosphere fixture')
+    
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+class FakeS3:
+    """Directory-backed stand-in for the boto3 S3 client calls the worker makes"""
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, key)
+    
+    def put(self, bucket: str, key: str, source_path: str):
+        path = self._path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(source_path, path)
+    
+    def download_file(self, Bucket, Key, Filename, Config=None, **kwargs):
+        shutil.copyfile(self._path(Bucket, Key), Filename)
+    
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Config=None, **kwargs):
+        self.put(Bucket, Key, Filename)
+    
+    def head_object(self, Bucket, Key):
+        with open(self._path(Bucket, Key), 'rb') as f:
+            return {'ETag': f'"{hashlib.md5(f.read()).hexdigest()}"'}
+    
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = hashlib.md5(f"{Bucket}/{Key}/{time.time()}".encode()).hexdigest()
+        os.makedirs(self._path(Bucket, f".multipart/{upload_id}"), exist_ok=True)
+        return {'UploadId': upload_id}
+    
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with open(self._path(Bucket, f".multipart/{UploadId}/{PartNumber:05d}"), 'wb') as f:
+            f.write(Body)
+        return {'ETag': f'"{PartNumber}"'}
+    
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts_dir = self._path(Bucket, f".multipart/{UploadId}")
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as out:
+            for part in MultipartUpload['Parts']:
+                with open(os.path.join(parts_dir, f"{part['PartNumber']:05d}"), 'rb') as f:
+                    shutil.copyfileobj(f, out)
+        shutil.rmtree(parts_dir)
+    
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        shutil.rmtree(self._path(Bucket, f".multipart/{UploadId}"), ignore_errors=True)
+
+def make_bench_processor(worker, s3_root: str):
+    """VideoProcessor with Postgres replaced by in-memory tables and S3 by ``FakeS3``"""
+    
+    class BenchProcessor(worker.VideoProcessor):
+        def setup_connections(self):
+            self.db_conn = None
+            self.s3_client = FakeS3(s3_root)
+            self.transfer_config = None
+            self.jobs: Dict[str, Dict] = {}
+            self.media_assets: Dict[str, Dict] = {}
+            self.audio_analysis: Dict = {}
+            self.render_outputs: Dict = {}
+        
+        def get_job(self, job_id):
+            return self.jobs.get(str(job_id))
+        
+        def update_job_status(self, job_id, status, **kwargs):
+            job = self.jobs.setdefault(str(job_id), {'id': job_id})
+            job['status'] = status
+            job.update({key: value for key, value in kwargs.items() if key not in ('started_at', 'completed_at')})
+        
+        def fetch_media_asset_rows(self, asset_ids):
+            return {asset_id: self.media_assets[asset_id] for asset_id in asset_ids if asset_id in self.media_assets}
+        
+        def get_cached_audio_analysis(self, content_hash, version=worker.AUDIO_ANALYSIS_VERSION):
+            cached = self.audio_analysis.get((content_hash, version))
+            worker.record_cache('beat_analysis', cached is not None)
+            return cached
+        
+        def store_audio_analysis(self, content_hash, duration, tempo, beat_times, version=worker.AUDIO_ANALYSIS_VERSION):
+            self.audio_analysis[(content_hash, version)] = (duration, list(beat_times))
+        
+        def get_render_output(self, fingerprint):
+            return self.render_outputs.get(fingerprint)
+        
+        def store_render_output(self, fingerprint, job):
+            stored = self.jobs.get(str(job['id']), {})
+            if stored.get('status') != 'completed':
+                return
+            self.render_outputs[fingerprint] = {
+                'source_job_id': str(job['id']),
+                'output_video_url': stored.get('output_video_url'),
+                'output_thumbnail_url': stored.get('output_thumbnail_url'),
+                'output_preview_url': stored.get('output_preview_url')
+            }
+    
+    return BenchProcessor
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KiB on Linux)
+
+    RUSAGE_CHILDREN is not reported: ffmpeg children inherit the parent's
+    high-water mark across fork+exec, which makes it meaningless here.
+    """
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def run_render_case(case: Dict, manifest: Dict, settings: Dict) -> List[Dict]:
+    """Render one (quality mode, image count, duration) case ``repeat`` times in this process"""
+    worker = load_worker()
+    scratch = tempfile.mkdtemp(prefix='video-bench-')
+    try:
+        s3_root = os.path.join(scratch, 's3')
+        config = worker.build_config()
+        config.update({
+            's3_bucket': BENCH_BUCKET,
+            'asset_cache_dir': os.path.join(scratch, 'asset-cache'),
+            'metrics_port': 0,
+            'prefetch_depth': 0,
+            'render_dedup': False  # Repeat runs measure warm caches, not a dedup short-circuit
+        })
+        config.update(settings)
+        processor = make_bench_processor(worker, s3_root)(config)
+        processor.logger.setLevel(settings.get('log_level', 'WARNING'))
+        s3 = processor.s3_client
+        
+        # Seed the fake bucket and media_assets table exactly as production lays them out
+        image_ids = []
+        for index, path in enumerate(manifest['images'][:case['images']]):
+            with open(path, 'rb') as f:
+                content_hash = hashlib.sha256(f.read()).hexdigest()
+            asset_id = f"00000000-0000-0000-0000-{index:012d}"
+            filename = os.path.basename(path)
+            processor.media_assets[asset_id] = {'id': asset_id, 'filename': filename, 'content_hash': content_hash}
+            s3.put(BENCH_BUCKET, f"media/{content_hash[:2]}/{content_hash}/{filename}", path)
+            image_ids.append(asset_id)
+        audio_file = os.path.basename(manifest['audio'][f"{case['duration']:g}"])
+        s3.put(BENCH_BUCKET, f"audio/{audio_file}", manifest['audio'][f"{case['duration']:g}"])
+        s3.put(BENCH_BUCKET, 'frames/golden-frame.png', manifest['frame'])
+        s3.put(BENCH_BUCKET, 'overlays/glitter-rain.mp4', manifest['overlay'])
+        
+        results = []
+        for run in range(case['repeat']):
+            job_id = f"00000000-0000-0000-0001-{run:012d}"
+            job = {
+                'id': job_id,
+                'tenant_id': BENCH_TENANT,
+                'status': 'processing',
+                'image_ids': image_ids,
+                'audio_file': audio_file,
+                'text_overlay': case.get('text', ''),
+                'overlay_type': 'golden-frame',
+                'quality_mode': case['mode'],
+                'duration_target': case['duration'],
+                'attempts': 0,
+                'max_attempts': 3
+            }
+            processor.jobs[job_id] = dict(job)
+            worker.METRICS.replace('video_encode_fps', {})
+            
+            started = time.perf_counter()
+            ok = processor.process_job(job_id, job=job)
+            wall = time.perf_counter() - started
+            
+            row = processor.jobs[job_id]
+            fps_values = list(worker.METRICS.metrics['video_encode_fps']['values'].values())
+            results.append({
+                **{key: case[key] for key in ('mode', 'images', 'duration')},
+                'run': run,
+                'ok': ok and row.get('status') == 'completed',
+                'error': row.get('last_error'),
+                'wall_s': round(wall, 3),
+                'processing_time_ms': row.get('processing_time_ms'),
+                'stages_ms': row.get('stage_timings', {}),
+                'encode_fps': round(fps_values[0], 1) if fps_values else None,
+                'peak_rss_mb': _peak_rss_mb()
+            })
+        return results
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def _render_case_entry(case: Dict, manifest: Dict, settings: Dict, results):
+    """Spawned-process entry point, so peak RSS is measured per case"""
+    try:
+        results.put(run_render_case(case, manifest, settings))
+    except Exception as e:
+        results.put([{**case, 'ok': False, 'error': f"{type(e).__name__}: {e}"}])
+
+def run_render_benchmark(cases: List[Dict], manifest: Dict, settings: Dict) -> List[Dict]:
+    """Run every case in its own fresh process (cold caches, independent peak RSS)"""
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for case in cases:
+        case_queue = ctx.Queue()
+        process = ctx.Process(target=_render_case_entry, args=(case, manifest, settings, case_queue))
+        process.start()
+        case_results = None
+        while case_results is None:
+            try:
+                case_results = case_queue.get(timeout=5)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                try:
+                    case_results = case_queue.get(timeout=1)  # Reported just before exiting
+                except queue.Empty:
+                    # Died without reporting (OOM kill, segfault): record the case instead of hanging
+                    case_results = [{**case, 'ok': False, 'error': f"case process exited with code {process.exitcode}"}]
+        process.join()
+        results.extend(case_results)
+        for result in case_results:
+            print(f"{result['mode']:>6} {result['images']:>2} img {result['duration']:>5g}s run {result.get('run', 0)}: "
+                  f"{'ok' if result['ok'] else 'FAILED ' + str(result.get('error'))} "
+                  f"{result.get('wall_s', 0):.1f}s", file=sys.stderr)
+    return results
+
+def compare_to_baseline(results: List[Dict], baseline_path: str):
+    """Annotate results with the change versus a previous JSON report of the same cases"""
+    with open(baseline_path) as f:
+        baseline = {
+            (r['mode'], r['images'], r['duration'], r.get('run', 0)): r
+            for r in json.load(f)['results']
+        }
+    for result in results:
+        previous = baseline.get((result['mode'], result['images'], result['duration'], result.get('run', 0)))
+        if not previous or not previous.get('processing_time_ms') or not result.get('processing_time_ms'):
+            continue
+        result['baseline_processing_time_ms'] = previous['processing_time_ms']
+        result['delta_pct'] = round(100.0 * (result['processing_time_ms'] / previous['processing_time_ms'] - 1), 1)
+        result['stage_delta_pct'] = {
+            stage: round(100.0 * (ms / previous['stages_ms'][stage] - 1), 1)
+            for stage, ms in result['stages_ms'].items()
+            if previous.get('stages_ms', {}).get(stage)
+        }
+
+def main():
+    """Run the selected benchmark and print JSON results"""
+    parser = argparse.ArgumentParser(description='Video processing worker benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    dispatch = subparsers.add_parser('dispatch', help='Enqueue-to-start latency: polling vs LISTEN/NOTIFY')
+    dispatch.add_argument('--jobs', type=int, default=20)
+    dispatch.add_argument('--max-gap', type=float, default=3.0, help='Max seconds between enqueues')
+    dispatch.add_argument('--modes', default='poll,listen')
+
+    beats = subparsers.add_parser('beats', help='Full librosa vs streaming beat detection: time, memory, accuracy')
+    beats.add_argument('audio', nargs='+', help='Audio files to analyse')
+    beats.add_argument('--duration', type=float, default=0.0, help='Analyse only the first N seconds (0 = whole track)')
+    
+    render = subparsers.add_parser('render', help='End-to-end process_job on synthetic fixtures: per-stage time, peak RSS, fps')
+    render.add_argument('--modes', default='normal,eco,freeze', help='Quality modes')
+    render.add_argument('--images', default='3,6', help='Image counts')
+    render.add_argument('--durations', default='10,30', help='Video durations in seconds')
+    render.add_argument('--repeat', type=int, default=1, help='Runs per case in the same process (run 0 is cold, later runs hit the caches)')
+    render.add_argument('--text', default='LUXURY', help='Text overlay for every job')
+    render.add_argument('--fixtures', default=os.path.join(tempfile.gettempdir(), 'video-bench-fixtures'))
+    render.add_argument('--seed', type=int, default=7)
+    render.add_argument('--config', default='{}', help='JSON overrides for the worker config (e.g. {"render_backend": "moviepy"})')
+    render.add_argument('--baseline', help='Previous JSON report to compare against')
+    render.add_argument('--output', help='Also write the JSON report to this file')
+
+    args = parser.parse_args()
+    worker = load_worker() if args.benchmark != 'render' else None  # Render cases load it in their own process
+
+    if args.benchmark == 'dispatch':
+        results = [
+            run_dispatch_benchmark(worker, mode, args.jobs, args.max_gap)
+            for mode in args.modes.split(',')
+        ]
+        print(json.dumps({'benchmark': 'dispatch', 'results': results}, indent=2))
+    elif args.benchmark == 'beats':
+        results = [run_beats_benchmark(worker, path, args.duration) for path in args.audio]
+        print(json.dumps({'benchmark': 'beats', 'results': results}, indent=2))
+    elif args.benchmark == 'render':
+        modes = args.modes.split(',')
+        image_counts = [int(n) for n in args.images.split(',')]
+        durations = [float(d) for d in args.durations.split(',')]
+        manifest = generate_fixtures(args.fixtures, max(image_counts), durations, args.seed)
+        cases = [
+            {'mode': mode, 'images': images, 'duration': duration, 'repeat': args.repeat, 'text': args.text}
+            for mode in modes for images in image_counts for duration in durations
+        ]
+        results = run_render_benchmark(cases, manifest, json.loads(args.config))
+        if args.baseline:
+            compare_to_baseline(results, args.baseline)
+        report = {
+            'benchmark': 'render',
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'fixtures': FIXTURE_VERSION,
+                'seed': args.seed,
+                'config': json.loads(args.config)
+            },
+            'results': results
+        }
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()